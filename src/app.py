@@ -2,7 +2,7 @@
 FastAPI application for Interactive Student Performance Dashboard.
 """
 
-from fastapi import FastAPI, Query, HTTPException, UploadFile, File
+from fastapi import FastAPI, Query, HTTPException, UploadFile, File, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse, Response
 from typing import Optional, List, Dict
@@ -10,10 +10,14 @@ import logging
 import pandas as pd
 import numpy as np
 import json
+import hashlib
+import orjson
 from datetime import datetime, date
 import shutil
+import threading
 from pathlib import Path
 import io
+from collections import OrderedDict
 
 from src.data_loader import get_data_loader
 from src.config import DATA_DIR, PROCESSED_DIR
@@ -72,6 +76,83 @@ def convert_to_serializable(obj):
         return str(obj)
 
 
+def _orjson_default(obj):
+    """Резервная сериализация типов, которые orjson не поддерживает напрямую."""
+    value = convert_to_serializable(obj)
+    if value is obj:
+        raise TypeError(f"Тип {type(obj).__name__} не сериализуется в JSON")
+    return value
+
+
+# Число сериализованных графиков, хранимых для повторной отдачи
+PLOT_JSON_CACHE_SIZE = 64
+
+# JSON графиков по id словаря; сам словарь хранится рядом, чтобы id
+# не мог достаться другому объекту, пока запись в кеше
+_plot_json_cache: "OrderedDict[int, tuple]" = OrderedDict()
+# Синхронные endpoints выполняются в пуле потоков - доступ к кешу под блокировкой
+_plot_json_cache_lock = threading.Lock()
+
+
+def _dump_json(obj) -> bytes:
+    """Сериализует объект через orjson с поддержкой NumPy и NaN."""
+    return orjson.dumps(
+        obj,
+        default=_orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def _plot_json(plot: Dict) -> bytes:
+    """
+    Сериализует один график, переиспользуя JSON для того же словаря.
+
+    Модуль plots отдаёт из кеша один и тот же словарь для одинаковых данных,
+    поэтому повторная сериализация не нужна.
+    """
+    key = id(plot)
+    with _plot_json_cache_lock:
+        entry = _plot_json_cache.get(key)
+        if entry is not None and entry[0] is plot:
+            _plot_json_cache.move_to_end(key)
+            return entry[1]
+
+    content = _dump_json(plot)
+
+    with _plot_json_cache_lock:
+        _plot_json_cache[key] = (plot, content)
+        _plot_json_cache.move_to_end(key)
+        while len(_plot_json_cache) > PLOT_JSON_CACHE_SIZE:
+            _plot_json_cache.popitem(last=False)
+    return content
+
+
+def serialize_plot_data(plot_dict: Dict) -> bytes:
+    """
+    Сериализует данные графиков в JSON одним проходом через orjson.
+
+    NaN и бесконечности записываются как null, массивы NumPy сериализуются
+    без поэлементного преобразования в объекты Python. Наборы графиков
+    (дашборд, сравнение) собираются из JSON отдельных графиков.
+
+    Args:
+        plot_dict: Словарь с данными графика или словарь графиков по именам
+
+    Returns:
+        JSON в виде байтов
+    """
+    if "data" in plot_dict or not all(
+        isinstance(plot, dict) for plot in plot_dict.values()
+    ):
+        return _plot_json(plot_dict)
+
+    parts = [
+        _dump_json(str(name)) + b":" + _plot_json(plot)
+        for name, plot in plot_dict.items()
+    ]
+    return b"{" + b",".join(parts) + b"}"
+
+
 app = FastAPI(
     title="Interactive Student Performance Dashboard",
     description="Web-приложение для визуализации успеваемости студентов",
@@ -215,6 +296,7 @@ async def get_plot_data(
     subject: Optional[str] = Query(None, description="Фильтр по предмету"),
     start_date: Optional[str] = Query(None, description="Начальная дата (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="Конечная дата (YYYY-MM-DD)"),
+    if_none_match: Optional[str] = Header(None),
 ):
     """Выдаёт данные для графиков."""
     try:
@@ -277,10 +359,18 @@ async def get_plot_data(
                 df, student_id=student_id_int, subject=subject
             )
 
-        # Преобразуем все numpy типы в стандартные Python типы для сериализации
-        plot_dict = convert_to_serializable(plot_dict)
+        # Сериализуем сразу в JSON, минуя повторный обход словаря FastAPI
+        content = serialize_plot_data(plot_dict)
+
+        # ETag по содержимому: если у клиента уже есть те же данные, отвечаем 304
+        etag = f'"{hashlib.blake2b(content, digest_size=8).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match is not None and etag in [
+            tag.strip() for tag in if_none_match.split(",")
+        ]:
+            return Response(status_code=304, headers=headers)
 
-        return plot_dict
+        return Response(content=content, media_type="application/json", headers=headers)
     except Exception as e:
         import traceback
 
@@ -4,10 +4,12 @@
 автоматический поиск новых оценок и кеширование данных.
 """
 
+import asyncio
 import pandas as pd
+import numpy as np
 import os
 import hashlib
-import json
+import orjson
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 from datetime import datetime
@@ -15,6 +17,15 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Движок чтения Excel: calamine (Rust) заметно быстрее openpyxl,
+# но является опциональной зависимостью
+try:
+    import python_calamine  # noqa: F401
+
+    EXCEL_ENGINE: Optional[str] = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
 
 class DataLoader:
     """Класс для загрузки и обработки данных об оценках студентов."""
@@ -23,6 +34,9 @@ class DataLoader:
     REQUIRED_COLUMNS = ["student_id", "student_name", "subject", "grade", "date"]
     OPTIONAL_COLUMNS = ["teacher", "assignment", "notes"]
 
+    # Поддерживаемые расширения файлов данных
+    DATA_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
     def __init__(self, data_dir: str = "data/raw", cache_dir: str = "data/processed"):
         """
         Инициализация DataLoader.
@@ -37,6 +51,44 @@ class DataLoader:
         self.cache_file = self.cache_dir / "data_cache.json"
         self.last_processed_hash = None
 
+    def _scan_data_files(self) -> List[os.DirEntry]:
+        """
+        Находит файлы данных в data_dir за один проход по директории.
+
+        os.scandir возвращает закешированный stat, поэтому время изменения
+        файлов не требует отдельных системных вызовов.
+
+        Returns:
+            Список записей директории с CSV/Excel файлами
+        """
+        if not self.data_dir.is_dir():
+            return []
+
+        with os.scandir(self.data_dir) as entries:
+            return [
+                entry
+                for entry in entries
+                if entry.is_file()
+                and os.path.splitext(entry.name)[1].lower() in self.DATA_EXTENSIONS
+            ]
+
+    def _discover_file(self) -> Path:
+        """
+        Находит самый новый файл данных в data_dir.
+
+        Returns:
+            Путь к файлу
+
+        Raises:
+            FileNotFoundError: Если файлы не найдены
+        """
+        files = self._scan_data_files()
+        if not files:
+            raise FileNotFoundError(f"Файлы данных не найдены в {self.data_dir}")
+
+        newest = max(files, key=lambda entry: entry.stat().st_mtime)
+        return Path(newest.path)
+
     def _calculate_file_hash(self, file_path: Path) -> str:
         """
         Вычисляет хеш файла для отслеживания изменений.
@@ -64,10 +116,8 @@ class DataLoader:
             return None
 
         try:
-            with open(self.cache_file, "r", encoding="utf-8") as f:
-                cache = json.load(f)
-            return cache
-        except (json.JSONDecodeError, IOError) as e:
+            return orjson.loads(self.cache_file.read_bytes())
+        except (orjson.JSONDecodeError, IOError) as e:
             logger.warning(f"Ошибка загрузки кеша: {e}")
             return None
 
@@ -88,24 +138,36 @@ class DataLoader:
                 "data_path": str(self.cache_dir / "cached_data.csv"),
             }
 
-            # Сохраняем DataFrame в CSV
+            # Файлы пишутся во временные и атомарно переименовываются, чтобы сбой
+            # во время записи не оставил поврежденный кеш
             data_path = self.cache_dir / "cached_data.csv"
-            data.to_csv(data_path, index=False, encoding="utf-8")
+            tmp_data_path = data_path.with_suffix(".csv.tmp")
+            data.to_csv(tmp_data_path, index=False, encoding="utf-8")
+            tmp_data_path.replace(data_path)
 
             # Сохраняем метаданные
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            tmp_cache_file = self.cache_file.with_suffix(".json.tmp")
+            tmp_cache_file.write_bytes(
+                orjson.dumps(
+                    cache_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                )
+            )
+            tmp_cache_file.replace(self.cache_file)
 
             logger.info(f"Данные сохранены в кеш: {data_path}")
         except Exception as e:
             logger.error(f"Ошибка сохранения кеша: {e}")
 
-    def _validate_structure(self, df: pd.DataFrame) -> Tuple[bool, List[str]]:
+    def _validate_structure(
+        self, df: pd.DataFrame, check_duplicates: bool = True
+    ) -> Tuple[bool, List[str]]:
         """
         Проверяет структуру данных на соответствие ожидаемым колонкам.
 
         Args:
             df: DataFrame для проверки
+            check_duplicates: Проверять ли дубликаты. Можно отключить для данных
+                после _normalize_data, где дубликаты уже удалены
 
         Returns:
             Кортеж (валидность, список ошибок)
@@ -138,7 +200,7 @@ class DataLoader:
                 errors.append("Колонка 'date' должна содержать валидные даты")
 
         # Проверка на дубликаты
-        if df.duplicated().any():
+        if check_duplicates and df.duplicated().any():
             errors.append("Обнаружены дублирующиеся записи")
 
         # Проверка на пропущенные значения в обязательных колонках
@@ -159,26 +221,28 @@ class DataLoader:
         Returns:
             Нормализованный DataFrame
         """
-        df = df.copy()
+        # Приведение названий колонок к нижнему регистру (без копирования данных)
+        df = df.set_axis(df.columns.str.lower().str.strip(), axis=1)
 
-        # Приведение названий колонок к нижнему регистру
-        df.columns = df.columns.str.lower().str.strip()
+        # Все преобразования колонок собираются и применяются одним assign,
+        # вместо полной копии и поочерёдной записи каждой колонки
+        converted = {}
 
         # Нормализация дат
         if "date" in df.columns:
-            df["date"] = pd.to_datetime(df["date"], errors="coerce")
+            converted["date"] = pd.to_datetime(df["date"], errors="coerce")
 
         # Нормализация числовых колонок
-        if "student_id" in df.columns:
-            df["student_id"] = pd.to_numeric(df["student_id"], errors="coerce")
-
-        if "grade" in df.columns:
-            df["grade"] = pd.to_numeric(df["grade"], errors="coerce")
+        for col in ("student_id", "grade"):
+            if col in df.columns:
+                converted[col] = pd.to_numeric(df[col], errors="coerce")
 
         # Удаление пробелов в строковых колонках
-        string_columns = df.select_dtypes(include=["object"]).columns
-        for col in string_columns:
-            df[col] = df[col].astype(str).str.strip()
+        string_columns = df.select_dtypes(include=["object", "string"]).columns
+        for col in string_columns.difference(list(converted)):
+            converted[col] = df[col].astype(str).str.strip()
+
+        df = df.assign(**converted)
 
         # Удаление дубликатов
         df = df.drop_duplicates()
@@ -204,18 +268,8 @@ class DataLoader:
             ValueError: Если формат файла не поддерживается
         """
         if file_path is None:
-            # Поиск файлов в директории
-            files = (
-                list(self.data_dir.glob("*.csv"))
-                + list(self.data_dir.glob("*.xlsx"))
-                + list(self.data_dir.glob("*.xls"))
-            )
-
-            if not files:
-                raise FileNotFoundError(f"Файлы данных не найдены в {self.data_dir}")
-
             # Используем самый новый файл
-            file_path = max(files, key=os.path.getmtime)
+            file_path = self._discover_file()
             logger.info(f"Найден файл: {file_path}")
 
         file_path = Path(file_path)
@@ -242,9 +296,11 @@ class DataLoader:
                     )
 
             elif file_ext in [".xlsx", ".xls"]:
-                df = pd.read_excel(
-                    file_path, engine="openpyxl" if file_ext == ".xlsx" else None
-                )
+                if EXCEL_ENGINE is not None:
+                    engine = EXCEL_ENGINE
+                else:
+                    engine = "openpyxl" if file_ext == ".xlsx" else None
+                df = pd.read_excel(file_path, engine=engine)
                 logger.info(f"Excel файл прочитан успешно")
 
             else:
@@ -257,6 +313,37 @@ class DataLoader:
             logger.error(f"Ошибка чтения файла {file_path}: {e}")
             raise
 
+    async def load_many(self, file_paths: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Параллельно читает несколько файлов данных и объединяет их.
+
+        Каждый файл читается через read_file в отдельном потоке: парсеры
+        pandas отпускают GIL, поэтому чтение файлов перекрывается.
+
+        Args:
+            file_paths: Список путей к файлам. Если None, читаются все
+                CSV/Excel файлы из data_dir
+
+        Returns:
+            Объединенный DataFrame со всеми прочитанными данными
+
+        Raises:
+            FileNotFoundError: Если файлы не найдены
+        """
+        if file_paths is None:
+            file_paths = sorted(entry.path for entry in self._scan_data_files())
+
+        if not file_paths:
+            raise FileNotFoundError(f"Файлы данных не найдены в {self.data_dir}")
+
+        frames = await asyncio.gather(
+            *(asyncio.to_thread(self.read_file, str(path)) for path in file_paths)
+        )
+        df = pd.concat(frames, ignore_index=True)
+
+        logger.info(f"Прочитано файлов: {len(frames)}, всего строк: {len(df)}")
+        return df
+
     def load_data(
         self, file_path: Optional[str] = None, use_cache: bool = True
     ) -> pd.DataFrame:
@@ -270,16 +357,9 @@ class DataLoader:
         Returns:
             DataFrame с обработанными данными
         """
-        # Определяем путь к файлу
+        # Определяем путь к файлу один раз: хеш и чтение используют один и тот же файл
         if file_path is None:
-            files = (
-                list(self.data_dir.glob("*.csv"))
-                + list(self.data_dir.glob("*.xlsx"))
-                + list(self.data_dir.glob("*.xls"))
-            )
-            if not files:
-                raise FileNotFoundError(f"Файлы данных не найдены в {self.data_dir}")
-            file_path = max(files, key=os.path.getmtime)
+            file_path = self._discover_file()
 
         file_path = Path(file_path)
         file_hash = self._calculate_file_hash(file_path)
@@ -291,7 +371,9 @@ class DataLoader:
                 cached_data_path = Path(cache["data_path"])
                 if cached_data_path.exists():
                     logger.info("Загрузка данных из кеша")
-                    df = pd.read_csv(cached_data_path)
+                    # Даты разбираются при чтении, чтобы графики и фильтры
+                    # не разбирали строки заново на каждом запросе
+                    df = pd.read_csv(cached_data_path, parse_dates=["date"])
                     self.last_processed_hash = file_hash
                     return df
 
@@ -302,8 +384,8 @@ class DataLoader:
         # Нормализация
         df = self._normalize_data(df)
 
-        # Проверка структуры
-        is_valid, errors = self._validate_structure(df)
+        # Проверка структуры (дубликаты уже удалены при нормализации)
+        is_valid, errors = self._validate_structure(df, check_duplicates=False)
         if not is_valid:
             error_msg = "Ошибки валидации структуры данных:\n" + "\n".join(errors)
             logger.error(error_msg)
@@ -379,16 +461,34 @@ class DataLoader:
                 )
                 return current_data
 
-            # Создаем индикаторные колонки для сравнения
-            current_keys = current_data[available_keys].apply(
-                lambda x: "|".join(x.astype(str)), axis=1
-            )
-            previous_keys = previous_data[available_keys].apply(
-                lambda x: "|".join(x.astype(str)), axis=1
-            )
+            current_keys = current_data[available_keys]
+            previous_keys = previous_data[available_keys].drop_duplicates()
 
-            # Находим новые записи
-            new_mask = ~current_keys.isin(previous_keys)
+            # Предыдущие данные прочитаны из CSV - приводим типы ключей к текущим
+            for col in available_keys:
+                dtype = current_keys[col].dtype
+                if previous_keys[col].dtype == dtype:
+                    continue
+                try:
+                    previous_keys[col] = previous_keys[col].astype(dtype)
+                except (TypeError, ValueError):
+                    # Пропуск (например, NaN в float-колонке ID) не совпадает
+                    # ни с одним текущим ключом целого типа - такие строки
+                    # отбрасываются, остальные приводятся к типу текущих
+                    previous_keys = previous_keys[previous_keys[col].notna()].astype(
+                        {col: dtype}
+                    )
+
+            packed = self._pack_keys(current_keys, previous_keys)
+            if packed is not None:
+                # Проверка вхождения по упакованным int64 ключам
+                new_mask = ~np.isin(*packed)
+            else:
+                # Разность множеств ключей одним hash join
+                merged = current_keys.merge(
+                    previous_keys, on=available_keys, how="left", indicator=True
+                )
+                new_mask = merged["_merge"].eq("left_only").to_numpy()
             new_grades = current_data[new_mask].copy()
 
             logger.info(
@@ -400,6 +500,45 @@ class DataLoader:
             logger.error(f"Ошибка при поиске новых оценок: {e}")
             return current_data
 
+    @staticmethod
+    def _pack_keys(
+        current_keys: pd.DataFrame, previous_keys: pd.DataFrame
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Упаковывает составной ключ из нескольких колонок в один int64 на строку.
+
+        Каждая колонка факторизуется по объединению текущих и предыдущих
+        значений, после чего коды складываются в смешанной системе счисления.
+        Одинаковые ключи получают одинаковые числа в обоих наборах.
+
+        Args:
+            current_keys: Ключевые колонки текущих данных
+            previous_keys: Те же колонки предыдущих данных
+
+        Returns:
+            Кортеж (ключи текущих данных, ключи предыдущих данных) или None,
+            если составной ключ не помещается в int64
+        """
+        n_current = len(current_keys)
+        current_packed = np.zeros(n_current, dtype=np.int64)
+        previous_packed = np.zeros(len(previous_keys), dtype=np.int64)
+        capacity = 1
+
+        for col in current_keys.columns:
+            codes, uniques = pd.factorize(
+                pd.concat([current_keys[col], previous_keys[col]], ignore_index=True),
+                use_na_sentinel=False,
+            )
+            size = max(len(uniques), 1)
+            capacity *= size
+            if capacity > np.iinfo(np.int64).max:
+                return None
+
+            current_packed = current_packed * size + codes[:n_current]
+            previous_packed = previous_packed * size + codes[n_current:]
+
+        return current_packed, previous_packed
+
     def get_students_list(self, df: pd.DataFrame) -> List[Dict]:
         """
         Получает список уникальных студентов из данных.
@@ -413,10 +552,17 @@ class DataLoader:
         if "student_id" not in df.columns or "student_name" not in df.columns:
             return []
 
-        students = df[["student_id", "student_name"]].drop_duplicates()
-        students_list = students.to_dict("records")
+        students = df[["student_id", "student_name"]].dropna(subset=["student_id"])
 
-        return students_list
+        # Один проход np.unique по массиву ID вместо drop_duplicates по двум
+        # колонкам; для каждого ID берется имя из первой записи
+        ids, first_idx = np.unique(students["student_id"].to_numpy(), return_index=True)
+        names = students["student_name"].to_numpy()[first_idx]
+
+        return [
+            {"student_id": int(student_id), "student_name": str(name)}
+            for student_id, name in zip(ids, names)
+        ]
 
     def get_grades(
         self,
@@ -437,40 +583,51 @@ class DataLoader:
             end_date: Конечная дата (формат: YYYY-MM-DD)
 
         Returns:
-            Отфильтрованный DataFrame
+            Отфильтрованный DataFrame (исходный, если ни одна строка не отброшена)
         """
-        filtered_df = df.copy()
+        # Условия собираются в одну маску, строки выбираются один раз без
+        # предварительного копирования
+        mask = np.ones(len(df), dtype=bool)
 
         if student_id is not None:
-            if "student_id" in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df["student_id"] == student_id]
+            if "student_id" in df.columns:
+                mask &= (df["student_id"] == student_id).to_numpy()
 
         if subject is not None:
-            if "subject" in filtered_df.columns:
-                filtered_df = filtered_df[
-                    filtered_df["subject"].str.lower() == subject.lower()
-                ]
+            if "subject" in df.columns:
+                # Нормализация как в plots._subject_mask (strip + casefold):
+                # к общему регистру приводятся только уникальные названия,
+                # строки сравниваются по кодам
+                codes, subjects = pd.factorize(df["subject"])
+                matching = np.flatnonzero(
+                    pd.Index(subjects).str.casefold() == subject.strip().casefold()
+                )
+                mask &= np.isin(codes, matching)
+
+        # Фильтрация по датам (строковые даты разбираются один раз)
+        if "date" in df.columns and (start_date is not None or end_date is not None):
+            dates = df["date"]
 
-        # Фильтрация по датам
-        if "date" in filtered_df.columns:
             if start_date is not None:
                 try:
                     start_dt = pd.to_datetime(start_date)
-                    filtered_df = filtered_df[
-                        pd.to_datetime(filtered_df["date"]) >= start_dt
-                    ]
+                    if not pd.api.types.is_datetime64_any_dtype(dates):
+                        dates = pd.to_datetime(dates)
+                    mask &= (dates >= start_dt).to_numpy()
                 except (ValueError, TypeError):
                     logger.warning(f"Некорректная начальная дата: {start_date}")
 
             if end_date is not None:
                 try:
                     end_dt = pd.to_datetime(end_date)
-                    filtered_df = filtered_df[
-                        pd.to_datetime(filtered_df["date"]) <= end_dt
-                    ]
+                    if not pd.api.types.is_datetime64_any_dtype(dates):
+                        dates = pd.to_datetime(dates)
+                    mask &= (dates <= end_dt).to_numpy()
                 except (ValueError, TypeError):
                     logger.warning(f"Некорректная конечная дата: {end_date}")
 
+        filtered_df = df if mask.all() else df[mask]
+
         return filtered_df
 
 
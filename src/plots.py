@@ -3,55 +3,104 @@
 Полностью переработанная версия с современным дизайном и новыми типами визуализаций.
 """
 
+import bisect
+import functools
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-from typing import Dict, List, Optional
+import plotly.io as pio
+from typing import Dict, List, Optional, Tuple
 import logging
 import numpy as np
-from scipy import stats
-from collections import Counter
 import json
 from pathlib import Path
 from src.config import PROCESSED_DIR
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True, slots=True)
+class Palette:
+    """Цветовая палитра графиков."""
+
+    primary: str = "#6366f1"  # Индиго
+    secondary: str = "#8b5cf6"  # Фиолетовый
+    success: str = "#10b981"  # Зеленый
+    warning: str = "#f59e0b"  # Оранжевый
+    danger: str = "#ef4444"  # Красный
+    info: str = "#3b82f6"  # Синий
+    light: str = "#e5e7eb"  # Светло-серый
+    dark: str = "#1f2937"  # Темно-серый
+    danger_fill: str = "rgba(239, 68, 68, 0.1)"  # Полупрозрачный красный для заливки
+    primary_fill: str = "rgba(99, 102, 241, 0.2)"  # Полупрозрачный индиго для заливки
+
+
 # Современная цветовая палитра
-COLORS = {
-    "primary": "#6366f1",  # Индиго
-    "secondary": "#8b5cf6",  # Фиолетовый
-    "success": "#10b981",  # Зеленый
-    "warning": "#f59e0b",  # Оранжевый
-    "danger": "#ef4444",  # Красный
-    "info": "#3b82f6",  # Синий
-    "light": "#e5e7eb",  # Светло-серый
-    "dark": "#1f2937",  # Темно-серый
+COLORS = Palette()
+
+# Общие настройки layout всех графиков; функции дополняют их своими параметрами
+BASE_LAYOUT = {
+    "template": "plotly_white",
+    "autosize": True,  # Адаптивный размер
+    "font": {"family": "Arial, sans-serif", "size": 11, "color": COLORS.dark},
+    "plot_bgcolor": "white",
+    "paper_bgcolor": "white",
 }
 
+# Развёрнутый шаблон plotly_white для графиков, собираемых напрямую из словарей
+# (go.Figure.to_dict() разворачивает шаблон так же)
+PLOTLY_TEMPLATE = pio.templates["plotly_white"].to_plotly_json()
+
+
+def _layout(**options) -> Dict:
+    """
+    Собирает layout графика из общих настроек и параметров конкретного графика.
+
+    Все графики строятся из словарей без go.Figure: это избавляет от
+    валидации и глубокого копирования объектов Plotly.
+
+    Args:
+        **options: Параметры layout конкретного графика
+
+    Returns:
+        Словарь layout
+    """
+    return {**BASE_LAYOUT, "template": PLOTLY_TEMPLATE, **options}
+
+
 # Градиентные цвета для тепловых карт (от зеленого для отличных оценок к желтому и красному для плохих)
-HEATMAP_COLORS = [
-    [0, "#dc2626"],  # Красный (плохие оценки)
-    [0.33, "#f59e0b"],  # Желтый/оранжевый (удовлетворительно)
-    [0.66, "#eab308"],  # Ярко-желтый (хорошо)
-    [1, "#22c55e"],  # Зеленый (отличные оценки)
-]
+HEATMAP_COLORS = (
+    (0, "#dc2626"),  # Красный (плохие оценки)
+    (0.33, "#f59e0b"),  # Желтый/оранжевый (удовлетворительно)
+    (0.66, "#eab308"),  # Ярко-желтый (хорошо)
+    (1, "#22c55e"),  # Зеленый (отличные оценки)
+)
 
 
-def get_max_grade_from_grading_system() -> Optional[float]:
+@functools.lru_cache(maxsize=1)
+def _load_max_grade(path: Path, mtime_ns: int, size: int) -> Optional[float]:
     """
-    Получает максимальную оценку из системы оценивания.
+    Читает максимальную оценку из файла системы оценивания.
+
+    Результат кешируется по времени изменения и размеру файла: пока файл
+    не перезаписан, повторные вызовы не обращаются к диску.
+
+    Args:
+        path: Путь к grading_system.json
+        mtime_ns: Время изменения файла в наносекундах (часть ключа кеша)
+        size: Размер файла в байтах (часть ключа кеша)
 
     Returns:
         Максимальная оценка или None, если система оценивания не настроена
     """
     try:
-        grading_system_file = PROCESSED_DIR / "grading_system.json"
-        if not grading_system_file.exists():
-            return None
-
-        with open(grading_system_file, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             grading_system = json.load(f)
 
         system_type = grading_system.get("system_type")
@@ -71,6 +120,602 @@ def get_max_grade_from_grading_system() -> Optional[float]:
         return None
 
 
+def get_max_grade_from_grading_system() -> Optional[float]:
+    """
+    Получает максимальную оценку из системы оценивания.
+
+    Returns:
+        Максимальная оценка или None, если система оценивания не настроена
+    """
+    grading_system_file = PROCESSED_DIR / "grading_system.json"
+    try:
+        stat = grading_system_file.stat()
+    except OSError:
+        return None
+    return _load_max_grade(grading_system_file, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=None)
+def _empty_plot(title: Optional[str] = None) -> Dict:
+    """
+    Возвращает пустой график с заголовком.
+
+    Словарь создаётся один раз на заголовок и переиспользуется, поэтому,
+    как и результаты cached_figure, изменять его нельзя.
+
+    Args:
+        title: Заголовок графика (если None, layout пустой)
+
+    Returns:
+        Словарь с пустыми данными для Plotly
+    """
+    return {"data": [], "layout": {"title": title} if title is not None else {}}
+
+
+def _add_month_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Разбирает даты и добавляет ключ месяца один раз для всех графиков.
+
+    Графики динамики и тепловой карты группируют оценки по месяцам; при
+    построении дашборда колонка month_key вычисляется здесь и
+    переиспользуется, а не пересчитывается в каждой функции.
+
+    Args:
+        df: DataFrame с данными об оценках
+
+    Returns:
+        DataFrame с разобранной колонкой date и колонкой month_key
+    """
+    if df.empty or "date" not in df.columns:
+        return df
+
+    dates = df["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+
+    return df.assign(date=dates, month_key=_month_keys(dates.to_frame()))
+
+
+def _month_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    Возвращает номер месяца от эпохи (int64) для каждой строки.
+
+    Группировка по целым числам дешевле, чем хеширование и сортировка
+    объектов Period. Используется готовая колонка month_key, если она есть.
+
+    Args:
+        df: DataFrame с разобранной колонкой date
+
+    Returns:
+        Массив номеров месяцев
+    """
+    if "month_key" in df.columns:
+        return df["month_key"].to_numpy()
+    return df["date"].to_numpy().astype("datetime64[M]").astype(np.int64)
+
+
+def _month_labels(month_keys: np.ndarray, date_format: str) -> List[str]:
+    """
+    Форматирует номера месяцев в подписи для оси.
+
+    Args:
+        month_keys: Номера месяцев от эпохи
+        date_format: Формат strftime
+
+    Returns:
+        Список подписей
+    """
+    month_starts = pd.DatetimeIndex(
+        np.asarray(month_keys, dtype=np.int64).astype("datetime64[M]")
+    )
+    return month_starts.strftime(date_format).tolist()
+
+
+# Число узлов сетки, на которую бинируются оценки при вычислении KDE
+KDE_GRID_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=32)
+def _gaussian_kernel_fft(grid_size: int, dx: float, bandwidth: float) -> np.ndarray:
+    """
+    Возвращает спектр гауссова ядра для свёртки на сетке с шагом dx.
+
+    Ядро дополняется нулями до удвоенного размера сетки, чтобы циклическая
+    свёртка через FFT не заворачивала плотность через края.
+
+    Args:
+        grid_size: Число узлов сетки
+        dx: Шаг сетки
+        bandwidth: Ширина ядра
+
+    Returns:
+        Результат np.fft.rfft для ядра длиной 2 * grid_size
+    """
+    offsets = np.arange(-grid_size, grid_size) * dx
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    kernel /= bandwidth * np.sqrt(2 * np.pi)
+    # Центр ядра переносим в нулевой индекс для циклической свёртки
+    return np.fft.rfft(np.fft.ifftshift(kernel))
+
+
+def _fast_kde_1d(samples: np.ndarray, x_eval: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет гауссову KDE через линейное бинирование и свёртку с помощью FFT.
+
+    Ширина ядра выбирается по правилу Скотта, как в scipy.stats.gaussian_kde,
+    но вместо суммы N x M гауссиан используется O(N + G log G) алгоритм.
+
+    Args:
+        samples: Одномерный массив наблюдений
+        x_eval: Возрастающая равномерная сетка точек, в которых нужна плотность
+
+    Returns:
+        Значения плотности в точках x_eval
+
+    Raises:
+        ValueError: Если наблюдений меньше двух или они все одинаковые
+    """
+    n_samples = samples.size
+    std = samples.std(ddof=1) if n_samples > 1 else 0.0
+    if not std > 0:
+        raise ValueError("Недостаточно разброса данных для оценки плотности")
+
+    bandwidth = std * n_samples ** (-1 / 5)
+    lo, hi = float(x_eval[0]), float(x_eval[-1])
+    grid_size = KDE_GRID_SIZE
+    dx = (hi - lo) / (grid_size - 1)
+
+    # Линейное бинирование: вес каждого наблюдения делится между двумя узлами
+    position = (samples - lo) / dx
+    left = np.clip(np.floor(position).astype(np.int64), 0, grid_size - 2)
+    frac = position - left
+    weights = np.bincount(left, weights=1 - frac, minlength=grid_size)
+    weights += np.bincount(left + 1, weights=frac, minlength=grid_size)
+
+    padded = np.zeros(2 * grid_size)
+    padded[:grid_size] = weights / n_samples
+    kernel_fft = _gaussian_kernel_fft(grid_size, dx, bandwidth)
+    density = np.fft.irfft(np.fft.rfft(padded) * kernel_fft, 2 * grid_size)
+
+    grid = np.linspace(lo, hi, grid_size)
+    return np.interp(x_eval, grid, np.clip(density[:grid_size], 0, None))
+
+
+def _linear_fit(x: np.ndarray, y: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Строит линейную регрессию y = slope * x + intercept методом наименьших квадратов.
+
+    Наклон, сдвиг и R² сводятся к трём суммам отклонений от средних, поэтому
+    scipy.stats.linregress (и импорт scipy) не нужен.
+
+    Args:
+        x: Значения независимой переменной (не все одинаковые)
+        y: Значения зависимой переменной
+
+    Returns:
+        Кортеж (наклон, сдвиг, R²)
+    """
+    x_mean, y_mean = x.mean(), y.mean()
+    x_dev = x - x_mean
+    y_dev = y - y_mean
+    sxy = x_dev @ y_dev
+    sxx = x_dev @ x_dev
+    syy = y_dev @ y_dev
+    slope = sxy / sxx
+    intercept = y_mean - slope * x_mean
+    r_squared = sxy * sxy / (sxx * syy) if syy > 0 else 0.0
+    return slope, intercept, r_squared
+
+
+# Максимальное число столбцов в графике распределения оценок
+DISTRIBUTION_MAX_BARS = 50
+
+# Минимальное число различных оценок, при котором строится KDE кривая
+KDE_MIN_UNIQUE_GRADES = 5
+
+# Промежуток между столбцами распределения: (максимальное число столбцов, bargap).
+# Чем меньше оценок, тем шире столбцы (для 1 оценки - без промежутков)
+DISTRIBUTION_BARGAPS = (
+    (1, 0.0),
+    (3, 0.02),
+    (5, 0.03),
+    (8, 0.05),
+    (12, 0.06),
+    (15, 0.08),
+    (20, 0.1),
+)
+
+
+def _distribution_bargap(num_bars: int) -> float:
+    """
+    Возвращает bargap графика распределения для заданного числа столбцов.
+
+    Args:
+        num_bars: Число столбцов (уникальных оценок или интервалов)
+
+    Returns:
+        Значение bargap для layout
+    """
+    index = bisect.bisect_left(DISTRIBUTION_BARGAPS, (num_bars,))
+    if index < len(DISTRIBUTION_BARGAPS):
+        return DISTRIBUTION_BARGAPS[index][1]
+    # Для большого количества оценок - плавная адаптация
+    return min(0.2, 0.08 + (num_bars - 20) * 0.002)
+
+
+# Число точек, начиная с которого scatter plot рисуется через WebGL (scattergl):
+# линии KDE и трендов короткие и остаются SVG, чтобы не занимать WebGL-контексты
+SCATTER_WEBGL_MIN_POINTS = 1000
+
+
+def _subject_mask(subjects: pd.Series, subject: str) -> np.ndarray:
+    """
+    Строит маску строк с заданным предметом без учёта регистра.
+
+    Для категориальной колонки к общему регистру (casefold) приводятся
+    только категории, а строки сравниваются по целочисленным кодам.
+
+    Args:
+        subjects: Колонка с названиями предметов
+        subject: Искомый предмет
+
+    Returns:
+        Булев массив длины колонки
+    """
+    target = subject.strip().casefold()
+    if isinstance(subjects.dtype, pd.CategoricalDtype):
+        codes = subjects.cat.codes.to_numpy()
+        matching = np.flatnonzero(subjects.cat.categories.str.casefold() == target)
+        if matching.size == 1:
+            return codes == matching[0]
+        return np.isin(codes, matching)
+    return (subjects.str.casefold() == target).to_numpy()
+
+
+def _grouped_stats(
+    df: pd.DataFrame, keys: List[str], value: str = "grade", median: bool = False
+) -> pd.DataFrame:
+    """
+    Считает среднее, стандартное отклонение и количество по группам за один проход.
+
+    Ключи факторизуются в целочисленные коды, суммы накапливаются через
+    np.bincount. Результат совпадает с groupby(keys)[value].agg(...)
+    .reset_index(): группы отсортированы по ключам, строки с пропущенным
+    ключом отбрасываются, пропуски в значениях не учитываются.
+
+    Args:
+        df: DataFrame с данными
+        keys: Колонки группировки
+        value: Агрегируемая колонка
+        median: Вычислять ли также медиану
+
+    Returns:
+        DataFrame с колонками ключей и колонками mean, std, count (и median)
+    """
+    codes = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    key_uniques = []
+    for key in keys:
+        key_codes, uniques = pd.factorize(df[key], sort=True)
+        valid &= key_codes >= 0
+        codes = codes * len(uniques) + key_codes
+        key_uniques.append(uniques)
+
+    group_ids, group_codes = np.unique(codes[valid], return_inverse=True)
+    n_groups = len(group_ids)
+    values = df[value].to_numpy(dtype=np.float64)[valid]
+    observed = ~np.isnan(values)
+    codes_obs, values_obs = group_codes[observed], values[observed]
+
+    count = np.bincount(codes_obs, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(codes_obs, weights=values_obs, minlength=n_groups) / count
+        squares = np.bincount(
+            codes_obs, weights=(values_obs - mean[codes_obs]) ** 2, minlength=n_groups
+        )
+        std = np.sqrt(squares / (count - 1))
+    std[count < 2] = np.nan
+
+    # Раскладываем составной код группы обратно на коды отдельных ключей
+    result = {}
+    remainder = group_ids
+    for key, uniques in reversed(list(zip(keys, key_uniques))):
+        remainder, key_codes = np.divmod(remainder, len(uniques))
+        result[key] = uniques.take(key_codes)
+    result = {key: result[key] for key in keys}
+    result.update(mean=mean, std=std, count=count)
+
+    if median:
+        # Медиана: сортируем значения внутри групп и берём середину каждой
+        order = np.lexsort((values_obs, codes_obs))
+        sorted_values = values_obs[order]
+        starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+        has_values = count > 0
+        lower = starts + np.maximum(count - 1, 0) // 2
+        upper = starts + count // 2
+        medians = np.full(n_groups, np.nan)
+        medians[has_values] = (
+            sorted_values[lower[has_values]] + sorted_values[upper[has_values]]
+        ) / 2
+        result["median"] = medians
+
+    return pd.DataFrame(result)
+
+
+def _filter_df(
+    df: pd.DataFrame,
+    student_id: Optional[int] = None,
+    subject: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Применяет фильтры по студенту и предмету одной булевой маской.
+
+    Вместо полной копии DataFrame и последовательной фильтрации маска
+    накапливается по всем условиям, а выборка строк делается один раз.
+    Если указаны колонки, в результат попадают только они.
+
+    Args:
+        df: DataFrame с данными об оценках
+        student_id: ID студента (если None, без фильтра)
+        subject: Предмет (если None или пустой, без фильтра)
+        columns: Колонки, которые читает график (отсутствующие пропускаются)
+
+    Returns:
+        Отфильтрованный DataFrame (исходный, если фильтры и колонки не заданы)
+    """
+    mask = None
+
+    if student_id is not None:
+        try:
+            student_id_int = int(student_id)
+            if "student_id" in df.columns:
+                ids = df["student_id"]
+                if not pd.api.types.is_numeric_dtype(ids):
+                    ids = pd.to_numeric(ids, errors="coerce")
+                mask = (ids == student_id_int).to_numpy()
+        except (ValueError, TypeError):
+            logger.warning(f"Некорректный student_id: {student_id}")
+
+    if subject is not None and subject.strip() and "subject" in df.columns:
+        subject_mask = _subject_mask(df["subject"], subject)
+        mask = subject_mask if mask is None else mask & subject_mask
+
+    if columns is not None:
+        columns = [col for col in columns if col in df.columns]
+        if mask is None:
+            return df[columns]
+        return df.loc[mask, columns]
+
+    if mask is None:
+        return df
+    return df.loc[mask]
+
+
+def _min_int_itemsize(lo: int, hi: int) -> int:
+    """
+    Возвращает размер (в байтах) наименьшего знакового целого типа для диапазона.
+
+    Args:
+        lo: Минимальное значение
+        hi: Максимальное значение
+
+    Returns:
+        Размер типа: 1, 2, 4 или 8
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype).itemsize
+    return 8
+
+
+def _ensure_plot_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит типы колонок к тем, с которыми работают функции построения графиков.
+
+    Оценки приводятся к float64 (значения показываются пользователю, поэтому
+    float32 с артефактами округления не используется), student_id - к
+    минимальному целому типу, предметы и имена студентов - к категориям,
+    даты разбираются один раз. Если типы уже подходят, DataFrame
+    возвращается без изменений.
+
+    Args:
+        df: DataFrame с данными об оценках
+
+    Returns:
+        DataFrame с нормализованными типами колонок
+    """
+    converted = {}
+
+    if "grade" in df.columns and not pd.api.types.is_float_dtype(df["grade"]):
+        converted["grade"] = pd.to_numeric(df["grade"], errors="coerce").astype(
+            np.float64
+        )
+
+    if "student_id" in df.columns:
+        ids = df["student_id"]
+        if not pd.api.types.is_numeric_dtype(ids):
+            ids = pd.to_numeric(ids, errors="coerce")
+        if (
+            pd.api.types.is_integer_dtype(ids)
+            and ids.dtype.itemsize > 1
+            and len(ids)
+            and _min_int_itemsize(ids.min(), ids.max()) < ids.dtype.itemsize
+        ):
+            ids = pd.to_numeric(ids, downcast="integer")
+        if ids.dtype != df["student_id"].dtype:
+            converted["student_id"] = ids
+
+    if "date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        converted["date"] = pd.to_datetime(df["date"], errors="coerce")
+
+    # Предметов и студентов немного относительно числа оценок: категории
+    # занимают меньше памяти и ускоряют фильтрацию, группировку и хеширование
+    for column in ("subject", "student_name"):
+        if column in df.columns and not isinstance(
+            df[column].dtype, pd.CategoricalDtype
+        ):
+            converted[column] = df[column].astype("category")
+
+    return df.assign(**converted) if converted else df
+
+
+def with_plot_dtypes(func):
+    """
+    Декоратор, нормализующий типы колонок перед построением графика.
+
+    Ставится под cached_figure: при попадании в кеш (ключ строится по
+    исходным колонкам) приведение типов не выполняется.
+    """
+
+    @functools.wraps(func)
+    def wrapper(df: pd.DataFrame, *args, **kwargs):
+        if not df.empty:
+            df = _ensure_plot_dtypes(df)
+        return func(df, *args, **kwargs)
+
+    return wrapper
+
+
+# Пул потоков для параллельного построения графиков дашборда
+_PLOT_EXECUTOR = ThreadPoolExecutor(max_workers=6, thread_name_prefix="plots")
+
+# Кеш готовых словарей графиков: ключ - функция, отпечаток данных и аргументы
+FIGURE_CACHE_SIZE = 128
+FIGURE_CACHE_TTL = 60.0
+_figure_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_figure_cache_lock = threading.Lock()
+
+
+# Дайджесты колонок по id(DataFrame). Все графики дашборда получают один и
+# тот же DataFrame, поэтому каждая колонка хешируется один раз за построение;
+# запись удаляется вместе с DataFrame
+_column_digests: Dict[int, Dict[str, bytes]] = {}
+_column_digests_lock = threading.Lock()
+
+
+def _column_digest(df: pd.DataFrame, column: str) -> bytes:
+    """
+    Возвращает хеш содержимого колонки, вычисляя его один раз на DataFrame.
+
+    Предполагается, что DataFrame, переданный в функции построения графиков,
+    не изменяется на месте.
+
+    Args:
+        df: DataFrame с данными об оценках
+        column: Имя колонки
+
+    Returns:
+        Дайджест значений колонки
+    """
+    key = id(df)
+    with _column_digests_lock:
+        digests = _column_digests.get(key)
+        if digests is None:
+            digests = _column_digests[key] = {}
+            weakref.finalize(df, _column_digests.pop, key, None)
+        digest = digests.get(column)
+
+    if digest is None:
+        values = pd.util.hash_pandas_object(df[column], index=False).to_numpy()
+        digest = hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+        with _column_digests_lock:
+            digests[column] = digest
+
+    return digest
+
+
+def _df_fingerprint(df: pd.DataFrame, columns: Optional[List[str]] = None) -> str:
+    """
+    Вычисляет отпечаток содержимого DataFrame для ключа кеша.
+
+    API перечитывает данные на каждый запрос, поэтому id(df) не подходит:
+    отпечаток строится по хешам значений колонок и совпадает для одинаковых
+    данных.
+
+    Args:
+        df: DataFrame с данными об оценках
+        columns: Колонки, по которым строится отпечаток (по умолчанию все)
+
+    Returns:
+        Шестнадцатеричная строка хеша
+    """
+    if columns is None:
+        columns = list(df.columns)
+    present = [col for col in columns if col in df.columns]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(present).encode())
+    for col in present:
+        digest.update(_column_digest(df, col))
+    return digest.hexdigest()
+
+
+def cached_figure(
+    columns: Optional[List[str]] = None, uses_grading_system: bool = False
+):
+    """
+    Декоратор, кеширующий результат построения графика.
+
+    При повторном вызове с теми же данными и аргументами возвращает
+    сохранённый словарь без обращения к Plotly. Отпечаток данных строится
+    только по колонкам, которые читает график, поэтому изменения в других
+    колонках не сбрасывают его кеш. Для графиков, зависящих от системы
+    оценивания, в ключ входит текущая максимальная оценка, так что смена
+    системы сразу даёт новый график. Записи живут не дольше FIGURE_CACHE_TTL
+    секунд, размер кеша ограничен FIGURE_CACHE_SIZE. Возвращаемый словарь
+    общий для всех вызовов и не должен изменяться.
+
+    Args:
+        columns: Колонки, от которых зависит график (по умолчанию все)
+        uses_grading_system: Читает ли график систему оценивания
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(df: pd.DataFrame, *args, **kwargs):
+            try:
+                key = (
+                    func.__name__,
+                    _df_fingerprint(df, columns),
+                    args,
+                    tuple(sorted(kwargs.items())),
+                    (
+                        get_max_grade_from_grading_system()
+                        if uses_grading_system
+                        else None
+                    ),
+                )
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Не удалось вычислить ключ кеша графика: {e}")
+                return func(df, *args, **kwargs)
+
+            now = time.monotonic()
+            with _figure_cache_lock:
+                entry = _figure_cache.get(key)
+                if entry is not None and now - entry[0] < FIGURE_CACHE_TTL:
+                    _figure_cache.move_to_end(key)
+                    return entry[1]
+
+            result = func(df, *args, **kwargs)
+
+            with _figure_cache_lock:
+                _figure_cache[key] = (now, result)
+                _figure_cache.move_to_end(key)
+                while len(_figure_cache) > FIGURE_CACHE_SIZE:
+                    _figure_cache.popitem(last=False)
+
+            return result
+
+        wrapper.cache_clear = _figure_cache.clear
+        return wrapper
+
+    return decorator
+
+
+@cached_figure(columns=["student_id", "student_name", "subject", "grade"])
+@with_plot_dtypes
 def create_grade_distribution_plot(
     df: pd.DataFrame, student_id: Optional[int] = None, subject: Optional[str] = None
 ) -> Dict:
@@ -88,223 +733,201 @@ def create_grade_distribution_plot(
     try:
         if df.empty or "grade" not in df.columns:
             logger.warning("Нет данных для графика распределения оценок")
-            return {"data": [], "layout": {"title": "Распределение оценок"}}
+            return _empty_plot("Распределение оценок")
 
         # Применяем фильтры
-        filtered_df = df.copy()
-
-        if student_id is not None:
-            try:
-                student_id_int = int(student_id)
-                if "student_id" in filtered_df.columns:
-                    filtered_df["student_id"] = pd.to_numeric(
-                        filtered_df["student_id"], errors="coerce"
-                    )
-                    filtered_df = filtered_df[
-                        filtered_df["student_id"] == student_id_int
-                    ]
-            except (ValueError, TypeError):
-                logger.warning(f"Некорректный student_id: {student_id}")
-
-        if subject is not None and subject.strip():
-            if "subject" in filtered_df.columns:
-                filtered_df = filtered_df[
-                    filtered_df["subject"].str.lower() == subject.lower().strip()
-                ]
+        filtered_df = _filter_df(
+            df,
+            student_id=student_id,
+            subject=subject,
+            columns=["grade", "student_name"],
+        )
 
         if filtered_df.empty:
             logger.warning("Нет данных после фильтрации для графика распределения")
-            return {
-                "data": [],
-                "layout": {"title": "Распределение оценок - Нет данных"},
-            }
+            return _empty_plot("Распределение оценок - Нет данных")
 
         # Формируем заголовок с учетом фильтров
         if student_id is not None and "student_name" in filtered_df.columns:
-            student_names = filtered_df["student_name"].unique()
-            if len(student_names) > 0:
-                if subject is not None and subject.strip():
-                    title_text = f"Распределение оценок студента {student_names[0]} по предмету {subject.strip()}"
-                else:
-                    title_text = f"Распределение оценок студента {student_names[0]}"
+            # Все строки принадлежат одному студенту - имя берём из первой
+            student_name = filtered_df["student_name"].iat[0]
+            if subject is not None and subject.strip():
+                title_text = f"Распределение оценок студента {student_name} по предмету {subject.strip()}"
+            else:
+                title_text = f"Распределение оценок студента {student_name}"
         elif subject is not None and subject.strip():
             title_text = f"Распределение оценок по предмету {subject.strip()}"
         else:
             title_text = "Распределение оценок"
 
-        # Обработка данных
-        grades = filtered_df["grade"].dropna()
-        grades_list = []
-        for g in grades.tolist():
-            try:
-                grade_val = float(g)
-                if not pd.isna(grade_val):
-                    grades_list.append(grade_val)
-            except (ValueError, TypeError):
-                continue
+        # Оценки уже числовые (with_plot_dtypes): пропуски отбрасываются маской
+        grades = filtered_df["grade"].to_numpy(dtype=np.float64)
+        grades = grades[~np.isnan(grades)]
 
-        if not grades_list or len(grades_list) == 0:
+        if grades.size == 0:
             logger.warning("Нет валидных оценок для графика распределения")
-            return {"data": [], "layout": {"title": "Распределение оценок"}}
+            return _empty_plot("Распределение оценок")
 
-        # Статистика
-        mean_grade = np.mean(grades_list)
-        median_grade = np.median(grades_list)
-        std_grade = np.std(grades_list)
-        min_grade = min(grades_list)
-        max_grade = max(grades_list)
+        # Частота каждой уникальной оценки (np.unique возвращает их отсортированными)
+        unique_grades, counts = np.unique(grades, return_counts=True)
 
-        # Подсчитываем частоту каждой уникальной оценки
-        grade_counts = Counter(grades_list)
-
-        # Сортируем оценки по значению
-        unique_grades_sorted = sorted(grade_counts.keys())
-        frequencies = [grade_counts[grade] for grade in unique_grades_sorted]
+        # Статистика (μ и σ для аннотации, границы - для KDE кривой) считается
+        # по уникальным оценкам с весами-частотами, без новых проходов по массиву
+        mean_grade = np.dot(unique_grades, counts) / grades.size
+        std_grade = np.sqrt(
+            np.dot(counts, (unique_grades - mean_grade) ** 2) / grades.size
+        )
+        min_grade = unique_grades[0]
+        max_grade = unique_grades[-1]
+        num_distinct_grades = len(unique_grades)
+
+        if len(unique_grades) > DISTRIBUTION_MAX_BARS:
+            # Дробных оценок может быть почти столько же, сколько наблюдений -
+            # группируем их в интервалы, чтобы размер графика не рос с данными
+            counts, edges = np.histogram(grades, bins=DISTRIBUTION_MAX_BARS)
+            # Интервалы подписываются границами "от–до". Число знаков зависит
+            # от ширины интервала: при ширине меньше 0.01 округлённые подписи
+            # совпали бы, и категориальная ось слила бы разные столбцы
+            decimals = max(2, int(np.ceil(-np.log10(edges[1] - edges[0]))) + 1)
+            bounds = np.char.mod(f"%.{decimals}f", edges)
+            labels = np.char.add(np.char.add(bounds[:-1], "–"), bounds[1:])
+            unique_grades, counts = labels[counts > 0], counts[counts > 0]
+        unique_grades_sorted = unique_grades.tolist()
+        frequencies = counts.tolist()
         num_unique_grades = len(unique_grades_sorted)
 
         # Вычисляем плотность (вероятность) для каждой оценки
-        total_count = len(grades_list)
-        densities = [freq / total_count for freq in frequencies]
+        total_count = grades.size
+        densities = (counts / total_count).tolist()
 
         # Всегда используем категориальную ось X - она показывает только те оценки, которые есть в данных
         # Столбцы будут одинаковой ширины и автоматически растянутся по всей ширине графика
         # bargap контролирует промежуток между столбцами: меньше bargap = шире столбцы
-        # Используем очень маленькие значения для максимально широких столбцов
-        if num_unique_grades == 1:
-            bargap = 0.0  # Максимально широкие столбцы для 1 оценки (без промежутков)
-        elif num_unique_grades <= 3:
-            bargap = 0.02  # Очень широкие столбцы для 2-3 оценок
-        elif num_unique_grades <= 5:
-            bargap = 0.03  # Широкие столбцы для 4-5 оценок
-        elif num_unique_grades <= 8:
-            bargap = 0.05  # Средне-широкие столбцы для 6-8 оценок
-        elif num_unique_grades <= 12:
-            bargap = 0.06  # Средние столбцы для 9-12 оценок (значительно уменьшено)
-        elif num_unique_grades <= 15:
-            bargap = 0.08  # Средне-узкие столбцы для 13-15 оценок
-        elif num_unique_grades <= 20:
-            bargap = 0.1  # Узкие столбцы для 16-20 оценок (значительно уменьшено)
-        else:
-            # Для большого количества оценок используем формулу для плавной адаптации
-            bargap = min(0.2, 0.08 + (num_unique_grades - 20) * 0.002)
-
-        # Создаем компактный график
-        fig = go.Figure()
+        bargap = _distribution_bargap(num_unique_grades)
 
         # Столбчатая диаграмма - по одной для каждой уникальной оценки
         # Категориальная ось X автоматически покажет только существующие оценки
         # и распределит столбцы равномерно с одинаковой шириной
-        fig.add_trace(
-            go.Bar(
-                x=unique_grades_sorted,
-                y=densities,
-                name="Распределение",
-                marker_color=COLORS["primary"],
-                marker_line_color="white",
-                marker_line_width=0.5,
-                opacity=0.8,
-                hovertemplate="Оценка: %{x}<br>Плотность: %{y:.3f}<br>Количество: %{customdata}<extra></extra>",
-                customdata=frequencies,
-                showlegend=False,
-            )
-        )
+        traces = [
+            {
+                "type": "bar",
+                "x": unique_grades_sorted,
+                "y": densities,
+                "name": "Распределение",
+                "marker": {
+                    "color": COLORS.primary,
+                    "line": {"color": "white", "width": 0.5},
+                },
+                "opacity": 0.8,
+                "hovertemplate": "Оценка: %{x}<br>Плотность: %{y:.3f}<br>Количество: %{customdata}<extra></extra>",
+                "customdata": frequencies,
+                "showlegend": False,
+            }
+        ]
 
-        # KDE кривая (оценка плотности) - упрощенная версия
-        try:
-            x_kde = np.linspace(min_grade, max_grade, 150)
-            kde = stats.gaussian_kde(grades_list)
-            y_kde = kde(x_kde)
-
-            fig.add_trace(
-                go.Scatter(
-                    x=x_kde,
-                    y=y_kde,
-                    mode="lines",
-                    name="KDE",
-                    line=dict(color=COLORS["danger"], width=2),
-                    fill="tozeroy",
-                    fillcolor=f"rgba(239, 68, 68, 0.1)",
-                    hovertemplate="Оценка: %{x:.2f}<br>Плотность: %{y:.3f}<extra></extra>",
-                    showlegend=False,
+        # KDE кривая (оценка плотности) - упрощенная версия. Для нескольких
+        # дискретных оценок сглаженная кривая не несёт информации - не строим
+        if num_distinct_grades >= KDE_MIN_UNIQUE_GRADES:
+            try:
+                x_kde = np.linspace(min_grade, max_grade, 150)
+                y_kde = _fast_kde_1d(grades, x_kde)
+
+                traces.append(
+                    {
+                        "type": "scatter",
+                        "x": x_kde,
+                        "y": y_kde,
+                        "mode": "lines",
+                        "name": "KDE",
+                        "line": {"color": COLORS.danger, "width": 2},
+                        "fill": "tozeroy",
+                        "fillcolor": COLORS.danger_fill,
+                        "hovertemplate": "Оценка: %{x:.2f}<br>Плотность: %{y:.3f}<extra></extra>",
+                        "showlegend": False,
+                    }
                 )
-            )
-        except Exception as e:
-            logger.warning(f"Не удалось построить KDE кривую: {e}")
+            except Exception as e:
+                logger.warning(f"Не удалось построить KDE кривую: {e}")
 
         # Компактный layout (без фиксированной высоты для адаптивности)
-        fig.update_layout(
+        layout = _layout(
             title={
                 "text": title_text,
                 "x": 0.5,
                 "xanchor": "center",
-                "font": {"size": 14, "color": COLORS["dark"]},
+                "font": {"size": 14, "color": COLORS.dark},
                 "y": 0.98,
                 "pad": {"b": 5},
             },
-            template="plotly_white",
             hovermode="x unified",
             showlegend=True,
-            autosize=True,  # Включаем автоподстройку размера
-            margin=dict(l=55, r=15, t=45, b=55),  # Компактные отступы для dashboard
-            font=dict(family="Arial, sans-serif", size=10, color=COLORS["dark"]),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
-            legend=dict(
-                x=0.99,  # Правее
-                y=0.99,  # Выше
-                xanchor="right",
-                yanchor="top",
-                bgcolor="rgba(255,255,255,0.9)",
-                bordercolor=COLORS["light"],
-                borderwidth=1,
-                font=dict(size=9),
-                itemwidth=30,
-                tracegroupgap=3,
-            ),
-            xaxis=dict(
-                title=dict(text="Оценка", font=dict(size=11)),
-                type="category",  # Всегда категориальная ось - показывает только существующие оценки
-                showgrid=True,
-                gridcolor=COLORS["light"],
-                gridwidth=0.5,
-                domain=[0, 1],  # Ось X занимает всю ширину графика (от 0 до 1)
-            ),
+            margin={
+                "l": 55,
+                "r": 15,
+                "t": 45,
+                "b": 55,
+            },  # Компактные отступы для dashboard
+            font={**BASE_LAYOUT["font"], "size": 10},
+            legend={
+                "x": 0.99,  # Правее
+                "y": 0.99,  # Выше
+                "xanchor": "right",
+                "yanchor": "top",
+                "bgcolor": "rgba(255,255,255,0.9)",
+                "bordercolor": COLORS.light,
+                "borderwidth": 1,
+                "font": {"size": 9},
+                "itemwidth": 30,
+                "tracegroupgap": 3,
+            },
+            xaxis={
+                "title": {"text": "Оценка", "font": {"size": 11}},
+                # Всегда категориальная ось - показывает только существующие оценки
+                "type": "category",
+                "showgrid": True,
+                "gridcolor": COLORS.light,
+                "gridwidth": 0.5,
+                "domain": [0, 1],  # Ось X занимает всю ширину графика (от 0 до 1)
+            },
             bargap=bargap,  # Промежуток между столбцами (контролирует ширину столбцов)
             bargroupgap=0,  # Убираем промежутки между группами столбцов (если есть)
-            yaxis=dict(
-                title=dict(text="Плотность", font=dict(size=11)),
-                showgrid=True,
-                gridcolor=COLORS["light"],
-                gridwidth=0.5,
-                rangemode="tozero",
-            ),
-        )
-
-        # Добавляем статистику в подзаголовок через аннотацию
-        fig.add_annotation(
-            x=0.02,
-            y=0.98,
-            xref="paper",
-            yref="paper",
-            text=f"μ={mean_grade:.2f} | σ={std_grade:.2f}",
-            showarrow=False,
-            font=dict(size=9, color=COLORS["dark"]),
-            bgcolor="rgba(255,255,255,0.8)",
-            bordercolor=COLORS["light"],
-            borderwidth=1,
-            xanchor="left",
-            yanchor="top",
+            yaxis={
+                "title": {"text": "Плотность", "font": {"size": 11}},
+                "showgrid": True,
+                "gridcolor": COLORS.light,
+                "gridwidth": 0.5,
+                "rangemode": "tozero",
+            },
+            # Статистика в подзаголовке через аннотацию
+            annotations=[
+                {
+                    "x": 0.02,
+                    "y": 0.98,
+                    "xref": "paper",
+                    "yref": "paper",
+                    "text": f"μ={mean_grade:.2f} | σ={std_grade:.2f}",
+                    "showarrow": False,
+                    "font": {"size": 9, "color": COLORS.dark},
+                    "bgcolor": "rgba(255,255,255,0.8)",
+                    "bordercolor": COLORS.light,
+                    "borderwidth": 1,
+                    "xanchor": "left",
+                    "yanchor": "top",
+                }
+            ],
         )
 
-        return fig.to_dict()
+        return {"data": traces, "layout": layout}
     except Exception as e:
         logger.error(f"Ошибка создания графика распределения оценок: {e}")
         import traceback
 
         logger.error(traceback.format_exc())
-        return {"data": [], "layout": {"title": "Распределение оценок - Ошибка"}}
+        return _empty_plot("Распределение оценок - Ошибка")
 
 
+@cached_figure(columns=["student_id", "student_name", "subject", "grade", "date"])
+@with_plot_dtypes
 def create_performance_trend_plot(
     df: pd.DataFrame, student_id: Optional[int] = None, subject: Optional[str] = None
 ) -> Dict:
@@ -324,81 +947,53 @@ def create_performance_trend_plot(
         # Проверка входных данных
         if df.empty or "date" not in df.columns or "grade" not in df.columns:
             logger.warning("Нет данных для графика динамики успеваемости")
-            return {"data": [], "layout": {"title": "Динамика успеваемости"}}
-
-        filtered_df = df.copy()
-
-        # Применяем фильтры по студенту
-        if student_id is not None:
-            try:
-                student_id_int = int(student_id)
-                if "student_id" in filtered_df.columns:
-                    filtered_df["student_id"] = pd.to_numeric(
-                        filtered_df["student_id"], errors="coerce"
-                    )
-                    filtered_df = filtered_df[
-                        filtered_df["student_id"] == student_id_int
-                    ]
-            except (ValueError, TypeError):
-                logger.warning(f"Некорректный student_id: {student_id}")
-
-        # Применяем фильтры по предмету
-        if subject is not None and subject.strip():
-            if "subject" in filtered_df.columns:
-                filtered_df = filtered_df[
-                    filtered_df["subject"].str.lower() == subject.lower().strip()
-                ]
+            return _empty_plot("Динамика успеваемости")
+
+        # Применяем фильтры по студенту и предмету
+        filtered_df = _filter_df(
+            df,
+            student_id=student_id,
+            subject=subject,
+            columns=["date", "grade", "student_name", "month_key"],
+        )
 
         if filtered_df.empty:
             logger.warning("Нет данных после фильтрации для графика динамики")
-            return {
-                "data": [],
-                "layout": {"title": "Динамика успеваемости - Нет данных"},
-            }
+            return _empty_plot("Динамика успеваемости - Нет данных")
 
-        # Обработка дат
-        filtered_df["date"] = pd.to_datetime(filtered_df["date"], errors="coerce")
+        # Даты уже разобраны декоратором with_plot_dtypes
         filtered_df = filtered_df.dropna(subset=["date", "grade"])
 
         if filtered_df.empty:
             logger.warning("Нет валидных дат для графика динамики")
-            return {"data": [], "layout": {"title": "Динамика успеваемости"}}
+            return _empty_plot("Динамика успеваемости")
 
-        # Сортируем по дате и создаем периоды
-        filtered_df = filtered_df.sort_values("date")
-        filtered_df["year_month"] = filtered_df["date"].dt.to_period("M")
-
-        # Агрегация по месяцам
-        monthly_stats = (
-            filtered_df.groupby("year_month")["grade"]
-            .agg(["mean", "median", "std", "count", "min", "max"])
-            .reset_index()
-        )
+        # Агрегация по месяцам (целое число месяцев от эпохи) одним проходом
+        # через bincount; ключи группировки отсортированы по возрастанию
+        monthly_stats = _grouped_stats(
+            filtered_df.assign(month_key=_month_keys(filtered_df)),
+            ["month_key"],
+            median=True,
+        ).set_index("month_key")
 
         # Фильтруем месяцы с достаточным количеством данных (минимум 1 оценка)
         monthly_stats = monthly_stats[monthly_stats["count"] >= 1]
 
         if monthly_stats.empty:
             logger.warning("Нет месяцев с данными")
-            return {
-                "data": [],
-                "layout": {"title": "Динамика успеваемости - Недостаточно данных"},
-            }
-
-        # Сортируем по периоду
-        monthly_stats = monthly_stats.sort_values("year_month")
+            return _empty_plot("Динамика успеваемости - Недостаточно данных")
 
         # Адаптивный выбор периода: если данных больше 12 месяцев, показываем последние 12
         max_months_to_show = 12
         if len(monthly_stats) > max_months_to_show:
-            monthly_stats = monthly_stats.tail(max_months_to_show).copy()
+            monthly_stats = monthly_stats.tail(max_months_to_show)
             logger.info(
                 f"Ограничен период до последних {max_months_to_show} месяцев для лучшей читаемости графика"
             )
 
-        # Создаем строковые метки для месяцев
-        monthly_stats["month_str"] = monthly_stats["year_month"].apply(
-            lambda x: x.strftime("%b %Y") if pd.notna(x) else str(x)
+        # Создаем строковые метки для месяцев (форматируются только показываемые)
+        monthly_stats = monthly_stats.reset_index(drop=True).assign(
+            month_str=_month_labels(monthly_stats.index, "%b %Y")
         )
 
         # Заполняем NaN в std
@@ -407,10 +1002,7 @@ def create_performance_trend_plot(
         # Проверяем, что есть данные для отображения
         if len(monthly_stats) == 0:
             logger.warning("Нет данных для отображения на графике")
-            return {
-                "data": [],
-                "layout": {"title": "Динамика успеваемости - Нет данных"},
-            }
+            return _empty_plot("Динамика успеваемости - Нет данных")
 
         # Получаем список месяцев для оси X
         month_labels = monthly_stats["month_str"].tolist()
@@ -420,96 +1012,85 @@ def create_performance_trend_plot(
             logger.warning("Обнаружены NaN значения в данных")
             monthly_stats = monthly_stats.dropna(subset=["mean", "median"])
             if monthly_stats.empty:
-                return {
-                    "data": [],
-                    "layout": {"title": "Динамика успеваемости - Нет валидных данных"},
-                }
+                return _empty_plot("Динамика успеваемости - Нет валидных данных")
             month_labels = monthly_stats["month_str"].tolist()
 
         logger.info(f"Создание графика с {len(monthly_stats)} точками данных")
 
-        fig = go.Figure()
-
-        # Область доверия (std) - преобразуем в списки Python
-        upper_bound = (monthly_stats["mean"] + monthly_stats["std"]).tolist()
-        lower_bound = (monthly_stats["mean"] - monthly_stats["std"]).tolist()
-
-        fig.add_trace(
-            go.Scatter(
-                x=month_labels,
-                y=upper_bound,
-                mode="lines",
-                name="+1σ",
-                line=dict(width=0),
-                showlegend=False,
-                hoverinfo="skip",
-            )
-        )
-
-        fig.add_trace(
-            go.Scatter(
-                x=month_labels,
-                y=lower_bound,
-                mode="lines",
-                name="Область доверия",
-                fill="tonexty",
-                fillcolor=f"rgba(99, 102, 241, 0.2)",
-                line=dict(width=0),
-                hovertemplate="Период: %{x}<br>Нижняя граница: %{y:.2f}<extra></extra>",
-            )
-        )
-
-        # Основная линия (среднее) - преобразуем в список Python
-        mean_values = monthly_stats["mean"].tolist()
-        count_values = monthly_stats["count"].tolist()
-
-        fig.add_trace(
-            go.Scatter(
-                x=month_labels,
-                y=mean_values,
-                mode="lines+markers",
-                name="Средняя оценка",
-                line=dict(color=COLORS["primary"], width=3),
-                marker=dict(
-                    size=10, color=COLORS["primary"], line=dict(width=2, color="white")
-                ),
-                hovertemplate="Период: %{x}<br>Средняя оценка: %{y:.2f}<br>Количество: %{customdata}<extra></extra>",
-                customdata=count_values,
-            )
-        )
-
-        # Линия медианы - преобразуем в список Python
-        median_values = monthly_stats["median"].tolist()
-
-        fig.add_trace(
-            go.Scatter(
-                x=month_labels,
-                y=median_values,
-                mode="lines",
-                name="Медианная оценка",
-                line=dict(color=COLORS["success"], width=2, dash="dash"),
-                hovertemplate="Период: %{x}<br>Медианная оценка: %{y:.2f}<extra></extra>",
-            )
-        )
+        # Среднее, медиана, количество и область доверия (std) остаются
+        # массивами NumPy - API сериализует их orjson напрямую
+        mean_values = monthly_stats["mean"].to_numpy(dtype=np.float64)
+        std_values = monthly_stats["std"].to_numpy(dtype=np.float64)
+        median_values = monthly_stats["median"].to_numpy(dtype=np.float64)
+        count_values = monthly_stats["count"].to_numpy(dtype=np.int64)
+        upper_bound = mean_values + std_values
+        lower_bound = mean_values - std_values
+
+        traces = [
+            {
+                "type": "scatter",
+                "x": month_labels,
+                "y": upper_bound,
+                "mode": "lines",
+                "name": "+1σ",
+                "line": {"width": 0},
+                "showlegend": False,
+                "hoverinfo": "skip",
+            },
+            {
+                "type": "scatter",
+                "x": month_labels,
+                "y": lower_bound,
+                "mode": "lines",
+                "name": "Область доверия",
+                "fill": "tonexty",
+                "fillcolor": COLORS.primary_fill,
+                "line": {"width": 0},
+                "hovertemplate": "Период: %{x}<br>Нижняя граница: %{y:.2f}<extra></extra>",
+            },
+            {
+                "type": "scatter",
+                "x": month_labels,
+                "y": mean_values,
+                "mode": "lines+markers",
+                "name": "Средняя оценка",
+                "line": {"color": COLORS.primary, "width": 3},
+                "marker": {
+                    "size": 10,
+                    "color": COLORS.primary,
+                    "line": {"width": 2, "color": "white"},
+                },
+                "hovertemplate": "Период: %{x}<br>Средняя оценка: %{y:.2f}<br>Количество: %{customdata}<extra></extra>",
+                "customdata": count_values,
+            },
+            {
+                "type": "scatter",
+                "x": month_labels,
+                "y": median_values,
+                "mode": "lines",
+                "name": "Медианная оценка",
+                "line": {"color": COLORS.success, "width": 2, "dash": "dash"},
+                "hovertemplate": "Период: %{x}<br>Медианная оценка: %{y:.2f}<extra></extra>",
+            },
+        ]
 
         # Трендовая линия (линейная регрессия)
         try:
             if len(monthly_stats) >= 2:
-                x_numeric = np.arange(len(monthly_stats))
-                slope, intercept, r_value, p_value, std_err = stats.linregress(
-                    x_numeric, monthly_stats["mean"]
-                )
-                trend_line = (slope * x_numeric + intercept).tolist()
-
-                fig.add_trace(
-                    go.Scatter(
-                        x=month_labels,
-                        y=trend_line,
-                        mode="lines",
-                        name=f"Тренд (R²={r_value**2:.3f})",
-                        line=dict(color=COLORS["danger"], width=2, dash="dot"),
-                        hovertemplate="Период: %{x}<br>Тренд: %{y:.2f}<extra></extra>",
-                    )
+                x_numeric = np.arange(len(monthly_stats), dtype=np.float64)
+                slope, intercept, r_squared = _linear_fit(x_numeric, mean_values)
+                trend_line = slope * x_numeric + intercept
+
+                traces.append(
+                    {
+                        "type": "scatter",
+                        "x": month_labels,
+                        "y": trend_line,
+                        "mode": "lines",
+                        "name": f"Тренд (R²={r_squared:.3f})",
+                        "line": {"color": COLORS.danger, "width": 2, "dash": "dot"},
+                        "hovertemplate": "Период: %{x}<br>Тренд: %{y:.2f}<extra></extra>",
+                    }
                 )
         except Exception as e:
             logger.warning(f"Не удалось построить трендовую линию: {e}")
@@ -517,12 +1098,9 @@ def create_performance_trend_plot(
         # Формируем заголовок
         title = "Динамика успеваемости"
         if student_id is not None:
+            # Все строки принадлежат одному студенту - имя берём из первой
             if not filtered_df.empty and "student_name" in filtered_df.columns:
-                student_names = filtered_df["student_name"].unique()
-                if len(student_names) > 0:
-                    title += f" - {student_names[0]}"
-                else:
-                    title += f" - Студент {student_id}"
+                title += f" - {filtered_df['student_name'].iat[0]}"
             else:
                 title += f" - Студент {student_id}"
         if subject is not None and subject.strip():
@@ -530,10 +1108,10 @@ def create_performance_trend_plot(
 
         # Вычисляем диапазон для оси Y
         # Учитываем не только средние значения, но и границы области доверия
-        min_mean = monthly_stats["mean"].min()
-        max_mean = monthly_stats["mean"].max()
-        min_lower = (monthly_stats["mean"] - monthly_stats["std"]).min()
-        max_upper = (monthly_stats["mean"] + monthly_stats["std"]).max()
+        min_mean = mean_values.min()
+        max_mean = mean_values.max()
+        min_lower = lower_bound.min()
+        max_upper = upper_bound.max()
 
         # Находим реальные минимальные и максимальные значения с учетом области доверия
         data_min = min(min_mean, min_lower)
@@ -553,69 +1131,67 @@ def create_performance_trend_plot(
         # Настройка оси Y с автоматическим масштабированием и ограничением меток
         # Используем autorange=True для автоматического масштабирования
         # и tickmode='auto' с nticks для скрытия части меток, чтобы избежать "мешанины"
-        yaxis_config = dict(
-            title=dict(text="Оценка", font=dict(size=12, color=COLORS["dark"])),
-            autorange=True,  # Автоматическое масштабирование
-            showgrid=True,
-            gridcolor="rgba(0,0,0,0.1)",
-            gridwidth=1,
-            showline=True,
-            linecolor="rgba(0,0,0,0.3)",
-            linewidth=1,
-            zeroline=False,
-            tickmode="auto",  # Автоматический режим - Plotly сам выберет метки
-            nticks=6,  # Ограничиваем количество меток максимум 6 - лишние будут скрыты
-            tickfont=dict(size=10, color=COLORS["dark"]),
-            side="left",
-            rangemode="normal",  # Нормальный режим масштабирования (не принудительно от 0)
-        )
+        yaxis_config = {
+            "title": {"text": "Оценка", "font": {"size": 12, "color": COLORS.dark}},
+            "autorange": True,  # Автоматическое масштабирование
+            "showgrid": True,
+            "gridcolor": "rgba(0,0,0,0.1)",
+            "gridwidth": 1,
+            "showline": True,
+            "linecolor": "rgba(0,0,0,0.3)",
+            "linewidth": 1,
+            "zeroline": False,
+            "tickmode": "auto",  # Автоматический режим - Plotly сам выберет метки
+            # Ограничиваем количество меток максимум 6 - лишние будут скрыты
+            "nticks": 6,
+            "tickfont": {"size": 10, "color": COLORS.dark},
+            "side": "left",
+            # Нормальный режим масштабирования (не принудительно от 0)
+            "rangemode": "normal",
+        }
 
         # Настройка layout с правильным автомасштабированием
-        fig.update_layout(
+        layout = _layout(
             title={
                 "text": title,
                 "x": 0.5,
                 "xanchor": "center",
-                "font": {"size": 18, "color": COLORS["dark"]},
+                "font": {"size": 18, "color": COLORS.dark},
             },
-            xaxis_title="Период",
-            template="plotly_white",
             hovermode="x unified",
-            xaxis=dict(
-                type="category",
-                categoryorder="array",
-                categoryarray=month_labels,
-                tickangle=-45,
-            ),
+            xaxis={
+                "title": {"text": "Период"},
+                "type": "category",
+                "categoryorder": "array",
+                "categoryarray": month_labels,
+                "tickangle": -45,
+            },
             yaxis=yaxis_config,
-            legend=dict(
-                x=0.98,
-                y=0.98,
-                xanchor="right",
-                yanchor="top",
-                bgcolor="rgba(255,255,255,0.95)",
-                bordercolor=COLORS["light"],
-                borderwidth=1,
-                font=dict(size=9),
-            ),
-            autosize=True,
-            margin=dict(
-                l=70, r=80, t=70, b=100
-            ),  # Увеличен нижний отступ для наклонных меток
-            font=dict(family="Arial, sans-serif", size=11, color=COLORS["dark"]),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
+            legend={
+                "x": 0.98,
+                "y": 0.98,
+                "xanchor": "right",
+                "yanchor": "top",
+                "bgcolor": "rgba(255,255,255,0.95)",
+                "bordercolor": COLORS.light,
+                "borderwidth": 1,
+                "font": {"size": 9},
+            },
+            # Увеличен нижний отступ для наклонных меток
+            margin={"l": 70, "r": 80, "t": 70, "b": 100},
         )
 
-        return fig.to_dict()
+        return {"data": traces, "layout": layout}
     except Exception as e:
         logger.error(f"Ошибка создания графика динамики успеваемости: {e}")
         import traceback
 
         logger.error(traceback.format_exc())
-        return {"data": [], "layout": {"title": "Динамика успеваемости - Ошибка"}}
+        return _empty_plot("Динамика успеваемости - Ошибка")
 
 
+@cached_figure(columns=["student_id", "student_name", "subject", "grade"])
+@with_plot_dtypes
 def create_subject_comparison_plot(
     df: pd.DataFrame, student_id: Optional[int] = None
 ) -> Dict:
@@ -631,86 +1207,98 @@ def create_subject_comparison_plot(
     """
     try:
         if df.empty or "subject" not in df.columns:
-            return {"data": [], "layout": {}}
+            return _empty_plot()
 
         # Фильтруем данные по студенту, если указан
-        filtered_df = df.copy()
+        filtered_df = _filter_df(
+            df,
+            student_id=student_id,
+            columns=["subject", "grade", "student_id", "student_name"],
+        )
         student_name = None
-        if student_id is not None:
-            if "student_id" in filtered_df.columns:
-                filtered_df = filtered_df[filtered_df["student_id"] == student_id]
-                # Получаем имя студента для заголовка
-                if "student_name" in filtered_df.columns and not filtered_df.empty:
-                    student_name = filtered_df["student_name"].iloc[0]
+        if student_id is not None and "student_id" in filtered_df.columns:
+            # Получаем имя студента для заголовка
+            if "student_name" in filtered_df.columns and not filtered_df.empty:
+                student_name = filtered_df["student_name"].iloc[0]
 
         if filtered_df.empty:
-            return {"data": [], "layout": {}}
+            return _empty_plot()
 
-        subject_stats = (
-            filtered_df.groupby("subject")["grade"]
-            .agg(["mean", "std", "count", "median"])
-            .reset_index()
-        )
+        subject_stats = _grouped_stats(filtered_df, ["subject"], median=True)
 
         subject_stats = subject_stats.sort_values("mean", ascending=False)
         subject_stats["std"] = subject_stats["std"].fillna(0)
 
-        fig = go.Figure()
-
         # Столбчатая диаграмма с ошибками
-        colors = px.colors.qualitative.Set3[: len(subject_stats)]
-
         # Вертикальные столбцы: предметы на оси X, оценки на оси Y
         # Высота столбцов напрямую соответствует средним оценкам по предмету
-        mean_values = subject_stats[
-            "mean"
-        ].tolist()  # Преобразуем в список для точной передачи значений
-
-        fig.add_trace(
-            go.Bar(
-                x=subject_stats["subject"].tolist(),  # Предметы на горизонтальной оси X
-                y=mean_values,  # Средние оценки на вертикальной оси Y - высота столбца = значение оценки
-                name="Средняя оценка",
-                orientation="v",  # Явно указываем вертикальную ориентацию
-                marker_color=COLORS["primary"],
-                marker_line_color="white",
-                marker_line_width=2,
-                error_y=dict(
-                    type="data",
-                    array=subject_stats["std"],
-                    visible=True,
-                    color=COLORS["dark"],
-                    thickness=2,
-                ),
-                text=[
-                    f"{val:.2f}" for val in mean_values
-                ],  # Форматирование с 2 знаками после запятой - соответствует высоте столбца
-                textposition="auto",  # Автоматическое позиционирование
-                textfont=dict(size=10, color=COLORS["dark"]),
-                hovertemplate="Предмет: %{x}<br>Средняя оценка: %{y:.2f}<br>Ст. отклонение: %{customdata[0]:.2f}<br>Количество: %{customdata[1]}<extra></extra>",
-                customdata=subject_stats[["std", "count"]].values,
-            )
-        )
+        means = subject_stats["mean"].to_numpy(dtype=np.float64)
+        stds = subject_stats["std"].to_numpy(dtype=np.float64)
+
+        bar_trace = {
+            "type": "bar",
+            "x": subject_stats[
+                "subject"
+            ].to_numpy(),  # Предметы на горизонтальной оси X
+            "y": means,  # Средние оценки на оси Y - высота столбца = значение оценки
+            "name": "Средняя оценка",
+            "orientation": "v",  # Явно указываем вертикальную ориентацию
+            "marker": {"color": COLORS.primary, "line": {"color": "white", "width": 2}},
+            "error_y": {
+                "type": "data",
+                "array": stds,
+                "visible": True,
+                "color": COLORS.dark,
+                "thickness": 2,
+            },
+            # Подписи с 2 знаками после запятой форматируются одним вызовом
+            "text": np.char.mod("%.2f", means).tolist(),
+            "textposition": "auto",  # Автоматическое позиционирование
+            "textfont": {"size": 10, "color": COLORS.dark},
+            "hovertemplate": "Предмет: %{x}<br>Средняя оценка: %{y:.2f}<br>Ст. отклонение: %{customdata[0]:.2f}<br>Количество: %{customdata[1]}<extra></extra>",
+            # Столбцы объектного массива сохраняют количество целым
+            # (column_stack по float-массиву привёл бы его к float)
+            "customdata": np.column_stack(
+                (
+                    stds.astype(object),
+                    subject_stats["count"].to_numpy(dtype=np.int64).astype(object),
+                )
+            ),
+        }
 
-        # Горизонтальная линия для общего среднего (вычисляется на основе отфильтрованных данных)
+        # Горизонтальная линия для общего среднего (вычисляется на основе отфильтрованных данных):
+        # линия на всю ширину области графика и подпись справа от неё
         overall_mean = filtered_df["grade"].mean()
         if student_name:
             annotation_text = f"Среднее студента: {overall_mean:.2f}"
         else:
             annotation_text = f"Общее среднее: {overall_mean:.2f}"
-        fig.add_hline(
-            y=overall_mean,
-            line_dash="dash",
-            line_color=COLORS["danger"],
-            annotation_text=annotation_text,
-            annotation_position="right",
-        )
+        mean_line = {
+            "type": "line",
+            "xref": "x domain",
+            "yref": "y",
+            "x0": 0,
+            "x1": 1,
+            "y0": overall_mean,
+            "y1": overall_mean,
+            "line": {"color": COLORS.danger, "dash": "dash"},
+        }
+        mean_annotation = {
+            "text": annotation_text,
+            "showarrow": False,
+            "xref": "x domain",
+            "yref": "y",
+            "x": 1,
+            "y": overall_mean,
+            "xanchor": "left",
+            "yanchor": "middle",
+        }
 
         # Вычисляем диапазон данных для максимальной наглядности
         # Используем только средние значения для определения границ столбцов
         # (ошибки std отображаются как линии, они не должны влиять на масштаб)
-        max_grade = float(subject_stats["mean"].max())
-        min_grade = float(subject_stats["mean"].min())
+        max_grade = float(means.max())
+        min_grade = float(means.min())
 
         # Вычисляем диапазон данных
         data_range = max_grade - min_grade
@@ -758,50 +1346,51 @@ def create_subject_comparison_plot(
             title_text = "Сравнение средних оценок по предметам"
 
         # Настройка оси Y с вычисленным диапазоном для максимизации визуальной разницы
-        yaxis_config = dict(
-            title=dict(text="Средняя оценка", font=dict(size=12, color=COLORS["dark"])),
-            range=[y_min, y_max],  # Явно задаем диапазон для максимизации разницы
-            showgrid=True,
-            gridcolor="rgba(0,0,0,0.1)",
-            gridwidth=1,
-            showline=True,
-            linecolor="rgba(0,0,0,0.3)",
-            linewidth=1,
-            zeroline=False,
-            tickmode="auto",  # Автоматический режим - Plotly сам выберет метки
-            nticks=optimal_nticks,  # Адаптивное ограничение количества меток
-            tickfont=dict(size=10, color=COLORS["dark"]),
-            side="left",
-            rangemode="normal",  # Нормальный режим масштабирования (не принудительно от 0)
-        )
-
-        fig.update_layout(
+        yaxis_config = {
+            "title": {
+                "text": "Средняя оценка",
+                "font": {"size": 12, "color": COLORS.dark},
+            },
+            "range": [y_min, y_max],  # Явно задаем диапазон для максимизации разницы
+            "showgrid": True,
+            "gridcolor": "rgba(0,0,0,0.1)",
+            "gridwidth": 1,
+            "showline": True,
+            "linecolor": "rgba(0,0,0,0.3)",
+            "linewidth": 1,
+            "zeroline": False,
+            "tickmode": "auto",  # Автоматический режим - Plotly сам выберет метки
+            "nticks": optimal_nticks,  # Адаптивное ограничение количества меток
+            "tickfont": {"size": 10, "color": COLORS.dark},
+            "side": "left",
+            # Нормальный режим масштабирования (не принудительно от 0)
+            "rangemode": "normal",
+        }
+
+        layout = _layout(
             title={
                 "text": title_text,
                 "x": 0.5,
                 "xanchor": "center",
-                "font": {"size": 18, "color": COLORS["dark"]},
+                "font": {"size": 18, "color": COLORS.dark},
             },
-            xaxis_title="Предмет",
-            template="plotly_white",
             hovermode="x unified",
-            xaxis=dict(tickangle=-45),
+            xaxis={"title": {"text": "Предмет"}, "tickangle": -45},
             yaxis=yaxis_config,
-            autosize=True,  # Адаптивный размер
-            margin=dict(
-                l=70, r=80, t=70, b=100
-            ),  # Увеличен нижний отступ для повернутых меток
-            font=dict(family="Arial, sans-serif", size=11, color=COLORS["dark"]),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
+            # Увеличен нижний отступ для повернутых меток
+            margin={"l": 70, "r": 80, "t": 70, "b": 100},
+            shapes=[mean_line],
+            annotations=[mean_annotation],
         )
 
-        return fig.to_dict()
+        return {"data": [bar_trace], "layout": layout}
     except Exception as e:
         logger.error(f"Ошибка создания графика сравнения предметов: {e}")
-        return {"data": [], "layout": {}}
+        return _empty_plot()
 
 
+@cached_figure(columns=["student_id", "student_name", "subject", "grade"])
+@with_plot_dtypes
 def create_student_comparison_plot(
     df: pd.DataFrame, subject: Optional[str] = None, top_n: int = 10
 ) -> Dict:
@@ -818,24 +1407,17 @@ def create_student_comparison_plot(
     """
     try:
         if df.empty:
-            return {"data": [], "layout": {}}
-
-        filtered_df = df.copy()
+            return _empty_plot()
 
-        if subject is not None:
-            filtered_df = filtered_df[
-                filtered_df["subject"].str.lower() == subject.lower()
-            ]
+        filtered_df = _filter_df(
+            df, subject=subject, columns=["student_id", "student_name", "grade"]
+        )
 
         if filtered_df.empty:
-            return {"data": [], "layout": {}}
+            return _empty_plot()
 
         # Вычисляем средний балл по каждому студенту
-        student_avg = (
-            filtered_df.groupby(["student_id", "student_name"])["grade"]
-            .agg(["mean", "count", "std"])
-            .reset_index()
-        )
+        student_avg = _grouped_stats(filtered_df, ["student_id", "student_name"])
 
         # Берем top_n студентов по среднему баллу, затем сортируем по возрастанию слева направо
         student_avg = student_avg.nlargest(top_n, "mean")
@@ -845,39 +1427,37 @@ def create_student_comparison_plot(
         )
         student_avg["std"] = student_avg["std"].fillna(0)
 
-        # Явно преобразуем данные в списки Python с правильными типами
+        # Типы приводятся одним вызовом to_numpy на колонку вместо поэлементных float/int
         student_names = student_avg["student_name"].tolist()
-        mean_values = [float(val) for val in student_avg["mean"].tolist()]
-        std_values = [float(val) for val in student_avg["std"].tolist()]
-        count_values = [int(val) for val in student_avg["count"].tolist()]
-
-        fig = go.Figure()
+        mean_values = student_avg["mean"].to_numpy(dtype=np.float64)
+        std_values = student_avg["std"].to_numpy(dtype=np.float64)
+        count_values = student_avg["count"].to_numpy(dtype=np.int64)
 
         # Вертикальная столбчатая диаграмма: имена на X, оценки на Y
-        fig.add_trace(
-            go.Bar(
-                x=student_names,
-                y=mean_values,
-                orientation="v",
-                name="Средняя оценка",
-                marker_color=COLORS["primary"],
-                marker_line_color="white",
-                marker_line_width=2,
-                text=[
-                    f"{val:.2f}" for val in mean_values
-                ],  # Форматирование с 2 знаками после запятой
-                textposition="auto",  # Автоматическое позиционирование
-                textfont=dict(size=10, color=COLORS["dark"]),
-                hovertemplate="Студент: %{x}<br>Средняя оценка: %{y:.2f}<br>Количество: %{customdata[0]}<br>Ст. отклонение: %{customdata[1]:.2f}<extra></extra>",
-                customdata=list(zip(count_values, std_values)),
-            )
-        )
+        bar_trace = {
+            "type": "bar",
+            "x": student_names,
+            "y": mean_values,
+            "orientation": "v",
+            "name": "Средняя оценка",
+            "marker": {"color": COLORS.primary, "line": {"color": "white", "width": 2}},
+            # Форматирование с 2 знаками после запятой
+            "text": np.char.mod("%.2f", mean_values).tolist(),
+            "textposition": "auto",  # Автоматическое позиционирование
+            "textfont": {"size": 10, "color": COLORS.dark},
+            "hovertemplate": "Студент: %{x}<br>Средняя оценка: %{y:.2f}<br>Количество: %{customdata[0]}<br>Ст. отклонение: %{customdata[1]:.2f}<extra></extra>",
+            # Столбцы объектного массива сохраняют количество целым
+            # (column_stack по float-массиву привёл бы его к float)
+            "customdata": np.column_stack(
+                (count_values.astype(object), std_values.astype(object))
+            ),
+        }
 
         # Вычисляем диапазон данных для максимальной наглядности
         # Используем только средние значения для определения границ столбцов
         # (ошибки std отображаются как линии, они не должны влиять на масштаб)
-        max_grade = float(max(mean_values)) if mean_values else 0
-        min_grade = float(min(mean_values)) if mean_values else 0
+        max_grade = float(mean_values.max()) if mean_values.size else 0
+        min_grade = float(mean_values.min()) if mean_values.size else 0
 
         # Вычисляем диапазон данных
         data_range = max_grade - min_grade
@@ -925,54 +1505,57 @@ def create_student_comparison_plot(
             title += " (по всем предметам)"
 
         # Настройка оси Y с вычисленным диапазоном для максимизации визуальной разницы
-        yaxis_config = dict(
-            title=dict(text="Средняя оценка", font=dict(size=12, color=COLORS["dark"])),
-            range=[y_min, y_max],  # Явно задаем диапазон для максимизации разницы
-            showgrid=True,
-            gridcolor="rgba(0,0,0,0.1)",
-            gridwidth=1,
-            showline=True,
-            linecolor="rgba(0,0,0,0.3)",
-            linewidth=1,
-            zeroline=False,
-            tickmode="auto",  # Автоматический режим - Plotly сам выберет метки
-            nticks=optimal_nticks,  # Адаптивное ограничение количества меток
-            tickfont=dict(size=10, color=COLORS["dark"]),
-            side="left",
-            rangemode="normal",  # Нормальный режим масштабирования (не принудительно от 0)
-        )
-
-        fig.update_layout(
+        yaxis_config = {
+            "title": {
+                "text": "Средняя оценка",
+                "font": {"size": 12, "color": COLORS.dark},
+            },
+            "range": [y_min, y_max],  # Явно задаем диапазон для максимизации разницы
+            "showgrid": True,
+            "gridcolor": "rgba(0,0,0,0.1)",
+            "gridwidth": 1,
+            "showline": True,
+            "linecolor": "rgba(0,0,0,0.3)",
+            "linewidth": 1,
+            "zeroline": False,
+            "tickmode": "auto",  # Автоматический режим - Plotly сам выберет метки
+            "nticks": optimal_nticks,  # Адаптивное ограничение количества меток
+            "tickfont": {"size": 10, "color": COLORS.dark},
+            "side": "left",
+            # Нормальный режим масштабирования (не принудительно от 0)
+            "rangemode": "normal",
+        }
+
+        layout = _layout(
             title={
                 "text": title,
                 "x": 0.5,
                 "xanchor": "center",
-                "font": {"size": 18, "color": COLORS["dark"]},
+                "font": {"size": 18, "color": COLORS.dark},
             },
-            xaxis_title="Студент",
-            template="plotly_white",
             hovermode="x unified",
-            xaxis=dict(
-                tickangle=-45,  # Наклон меток для лучшей читаемости
-                categoryorder="array",
-                categoryarray=student_names,
-            ),
+            xaxis={
+                "title": {"text": "Студент"},
+                "tickangle": -45,  # Наклон меток для лучшей читаемости
+                "categoryorder": "array",
+                "categoryarray": student_names,
+            },
             yaxis=yaxis_config,
-            autosize=True,  # Адаптивный размер
-            margin=dict(
-                l=70, r=100, t=70, b=150
-            ),  # Увеличен нижний отступ для наклонных имен
-            font=dict(family="Arial, sans-serif", size=11, color=COLORS["dark"]),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
+            # Увеличен нижний отступ для наклонных имен
+            margin={"l": 70, "r": 100, "t": 70, "b": 150},
         )
 
-        return fig.to_dict()
+        return {"data": [bar_trace], "layout": layout}
     except Exception as e:
         logger.error(f"Ошибка создания графика сравнения студентов: {e}")
-        return {"data": [], "layout": {}}
+        return _empty_plot()
 
 
+@cached_figure(
+    columns=["student_id", "student_name", "subject", "grade", "date"],
+    uses_grading_system=True,
+)
+@with_plot_dtypes
 def create_subject_heatmap(df: pd.DataFrame, student_id: Optional[int] = None) -> Dict:
     """
     Создаёт улучшенную тепловую карту успеваемости по предметам и времени.
@@ -987,169 +1570,135 @@ def create_subject_heatmap(df: pd.DataFrame, student_id: Optional[int] = None) -
     try:
         if df.empty or "date" not in df.columns or "subject" not in df.columns:
             logger.warning("Нет данных для тепловой карты")
-            return {"data": [], "layout": {"title": "Тепловая карта по предметам"}}
-
-        filtered_df = df.copy()
+            return _empty_plot("Тепловая карта по предметам")
 
-        if student_id is not None:
-            try:
-                student_id_int = int(student_id)
-                if "student_id" in filtered_df.columns:
-                    filtered_df["student_id"] = pd.to_numeric(
-                        filtered_df["student_id"], errors="coerce"
-                    )
-                    filtered_df = filtered_df[
-                        filtered_df["student_id"] == student_id_int
-                    ]
-            except (ValueError, TypeError):
-                logger.warning(f"Некорректный student_id: {student_id}")
+        filtered_df = _filter_df(
+            df,
+            student_id=student_id,
+            columns=["date", "subject", "grade", "student_name", "month_key"],
+        )
 
         if filtered_df.empty:
             logger.warning("Нет данных после фильтрации для тепловой карты")
-            return {"data": [], "layout": {"title": "Тепловая карта по предметам"}}
+            return _empty_plot("Тепловая карта по предметам")
 
         filtered_df = filtered_df.dropna(subset=["date", "subject", "grade"])
 
         if filtered_df.empty:
             logger.warning("Нет валидных данных для тепловой карты")
-            return {"data": [], "layout": {"title": "Тепловая карта по предметам"}}
+            return _empty_plot("Тепловая карта по предметам")
+
+        # Средняя оценка по (предмет, месяц): строки и столбцы факторизуются
+        # в коды, суммы и количества копятся np.bincount по номеру ячейки
+        # в плоском массиве - без MultiIndex и unstack
+        subject_codes, subjects = pd.factorize(filtered_df["subject"], sort=True)
+        month_codes, months = pd.factorize(_month_keys(filtered_df), sort=True)
+        shape = (len(subjects), len(months))
+
+        cells = subject_codes * shape[1] + month_codes
+        sums = np.bincount(
+            cells,
+            weights=filtered_df["grade"].to_numpy(dtype=np.float64),
+            minlength=shape[0] * shape[1],
+        )
+        counts = np.bincount(cells, minlength=shape[0] * shape[1])
 
-        try:
-            filtered_df["date"] = pd.to_datetime(filtered_df["date"], errors="coerce")
-            filtered_df = filtered_df.dropna(subset=["date"])
+        # Пустые ячейки (0 / 0) становятся NaN
+        with np.errstate(invalid="ignore"):
+            z_array = (sums / counts).reshape(shape)
+        missing = np.isnan(z_array)
 
-            if filtered_df.empty:
-                logger.warning("Нет валидных дат для тепловой карты")
-                return {"data": [], "layout": {"title": "Тепловая карта по предметам"}}
+        if missing.all():
+            logger.warning("Нет валидных значений для тепловой карты")
+            return _empty_plot("Тепловая карта по предметам")
 
-            filtered_df["month"] = filtered_df["date"].dt.to_period("M").astype(str)
-        except Exception as e:
-            logger.error(f"Ошибка обработки дат для тепловой карты: {e}")
-            return {
-                "data": [],
-                "layout": {"title": "Тепловая карта по предметам - Ошибка"},
-            }
+        # Матрица z остаётся массивом NumPy: orjson сериализует её напрямую,
+        # пустые ячейки (NaN) становятся null
+        text_values = np.where(missing, "", np.char.mod("%.2f", z_array)).tolist()
 
-        try:
-            pivot_df = filtered_df.pivot_table(
-                values="grade",
-                index="subject",
-                columns="month",
-                aggfunc="mean",
-                fill_value=None,
-            )
+        z_min = 0  # Минимум всегда 0
 
-            if pivot_df.empty:
-                logger.warning("Сводная таблица для тепловой карты пуста")
-                return {"data": [], "layout": {"title": "Тепловая карта по предметам"}}
-
-            pivot_df.columns = [str(col) for col in pivot_df.columns]
-            pivot_df.index = pivot_df.index.astype(str)
-
-            z_values = pivot_df.values.tolist()
-            for i in range(len(z_values)):
-                for j in range(len(z_values[i])):
-                    if pd.isna(z_values[i][j]):
-                        z_values[i][j] = None
-
-            text_values = []
-            for row in z_values:
-                text_row = []
-                for val in row:
-                    if val is not None and not pd.isna(val):
-                        try:
-                            text_row.append(f"{float(val):.2f}")
-                        except (ValueError, TypeError):
-                            text_row.append("")
-                    else:
-                        text_row.append("")
-                text_values.append(text_row)
-
-            # Вычисляем реальный минимум и максимум из данных (исключая None)
-            all_values = [
-                val
-                for row in z_values
-                for val in row
-                if val is not None and not pd.isna(val)
-            ]
-            if not all_values:
-                logger.warning("Нет валидных значений для тепловой карты")
-                return {"data": [], "layout": {"title": "Тепловая карта по предметам"}}
-
-            z_min = 0  # Минимум всегда 0
-
-            # Получаем максимальную оценку из системы оценивания
-            max_grade_from_system = get_max_grade_from_grading_system()
-            if max_grade_from_system is not None:
-                z_max = max_grade_from_system
-            else:
-                # Если система оценивания не настроена, используем максимум из данных
-                z_max = max(all_values)
-
-            # Если максимум меньше 1, устанавливаем его в 1 для корректного отображения
-            if z_max < 1:
-                z_max = 1
-
-            fig = go.Figure(
-                data=go.Heatmap(
-                    z=z_values,
-                    x=pivot_df.columns.tolist(),
-                    y=pivot_df.index.tolist(),
-                    colorscale=HEATMAP_COLORS,
-                    zmin=z_min,  # Минимум для градиента
-                    zmax=z_max,  # Максимум для градиента (динамический)
-                    text=text_values,
-                    texttemplate="%{text}",
-                    textfont={
-                        "size": 11,
-                        "color": "#1f2937",
-                    },  # Темно-серый цвет для лучшей видимости на светлых цветах (желтый, зеленый)
-                    colorbar=dict(
-                        title=dict(text="Оценка", font=dict(size=14)),
-                        tickfont=dict(size=12),
-                    ),
-                    hovertemplate="Предмет: %{y}<br>Период: %{x}<br>Оценка: %{z:.2f}<extra></extra>",
-                )
-            )
+        # Получаем максимальную оценку из системы оценивания
+        max_grade_from_system = get_max_grade_from_grading_system()
+        if max_grade_from_system is not None:
+            z_max = max_grade_from_system
+        else:
+            # Если система оценивания не настроена, используем максимум из данных
+            z_max = z_array[~missing].max()
+
+        # Если максимум меньше 1, устанавливаем его в 1 для корректного отображения
+        if z_max < 1:
+            z_max = 1
+
+        heatmap_trace = {
+            "type": "heatmap",
+            "z": z_array,
+            "x": _month_labels(months, "%Y-%m"),
+            "y": pd.Index(subjects).astype(str).tolist(),
+            "colorscale": [list(stop) for stop in HEATMAP_COLORS],
+            "zmin": z_min,  # Минимум для градиента
+            "zmax": z_max,  # Максимум для градиента (динамический)
+            "text": text_values,
+            "texttemplate": "%{text}",
+            # Темно-серый цвет для лучшей видимости на светлых цветах (желтый, зеленый)
+            "textfont": {"size": 11, "color": "#1f2937"},
+            "colorbar": {
+                "title": {"text": "Оценка", "font": {"size": 14}},
+                "tickfont": {"size": 12},
+            },
+            "hovertemplate": "Предмет: %{y}<br>Период: %{x}<br>Оценка: %{z:.2f}<extra></extra>",
+        }
 
-            title = "Тепловая карта успеваемости по предметам"
-            if student_id is not None:
-                student_name = (
-                    filtered_df["student_name"].iloc[0]
-                    if "student_name" in filtered_df.columns and len(filtered_df) > 0
-                    else f"Студент {student_id}"
-                )
-                title += f" - {student_name}"
-
-            fig.update_layout(
-                title={
-                    "text": title,
-                    "x": 0.5,
-                    "xanchor": "center",
-                    "font": {"size": 18, "color": COLORS["dark"]},
-                },
-                xaxis_title="Период",
-                yaxis_title="Предмет",
-                template="plotly_white",
-                autosize=True,  # Адаптивный размер
-                margin=dict(l=100, r=100, t=70, b=100),  # Отступы для colorbar и меток
-                font=dict(family="Arial, sans-serif", size=11, color=COLORS["dark"]),
-                plot_bgcolor="white",
-                paper_bgcolor="white",
+        title = "Тепловая карта успеваемости по предметам"
+        if student_id is not None:
+            student_name = (
+                filtered_df["student_name"].iloc[0]
+                if "student_name" in filtered_df.columns and len(filtered_df) > 0
+                else f"Студент {student_id}"
             )
+            title += f" - {student_name}"
 
-            return fig.to_dict()
-        except Exception as e:
-            logger.error(f"Ошибка создания сводной таблицы для тепловой карты: {e}")
-            return {
-                "data": [],
-                "layout": {"title": "Тепловая карта по предметам - Ошибка"},
-            }
+        layout = _layout(
+            title={
+                "text": title,
+                "x": 0.5,
+                "xanchor": "center",
+                "font": {"size": 18, "color": COLORS.dark},
+            },
+            xaxis={"title": {"text": "Период"}},
+            yaxis={"title": {"text": "Предмет"}},
+            margin={
+                "l": 100,
+                "r": 100,
+                "t": 70,
+                "b": 100,
+            },  # Отступы для colorbar и меток
+        )
+
+        return {"data": [heatmap_trace], "layout": layout}
     except Exception as e:
         logger.error(f"Ошибка создания тепловой карты: {e}")
-        return {"data": [], "layout": {"title": "Тепловая карта по предметам - Ошибка"}}
-
-
+        return _empty_plot("Тепловая карта по предметам - Ошибка")
+
+
+# Layout violin plot не зависит от данных - собирается один раз
+VIOLIN_LAYOUT = _layout(
+    title={
+        "text": "Распределение оценок по предметам (Violin Plot)",
+        "x": 0.5,
+        "xanchor": "center",
+        "font": {"size": 18, "color": COLORS.dark},
+    },
+    xaxis={"title": {"text": "Предмет"}},
+    yaxis={"title": {"text": "Оценка"}, "range": [0, 5.5], "dtick": 0.5},
+    hovermode="x unified",
+    showlegend=False,
+    margin={"l": 70, "r": 80, "t": 70, "b": 100},  # Отступы для повернутых меток
+)
+
+
+@cached_figure(columns=["subject", "grade"])
+@with_plot_dtypes
 def create_box_plot_by_subject(df: pd.DataFrame) -> Dict:
     """
     Создаёт улучшенный violin plot оценок по предметам.
@@ -1163,81 +1712,49 @@ def create_box_plot_by_subject(df: pd.DataFrame) -> Dict:
     try:
         if df.empty or "subject" not in df.columns or "grade" not in df.columns:
             logger.warning("Нет данных для violin plot по предметам")
-            return {"data": [], "layout": {"title": "Violin-plot по предметам"}}
+            return _empty_plot("Violin-plot по предметам")
 
-        filtered_df = df.dropna(subset=["subject", "grade"])
+        # Одна маска вместо dropna и отдельного фильтра по шкале: NaN не
+        # проходит сравнения, пропущенные предметы отсекаются notna
+        grades = pd.to_numeric(df["grade"], errors="coerce").to_numpy(dtype=np.float64)
+        valid = (grades >= 0) & (grades <= 5) & df["subject"].notna().to_numpy()
 
-        if filtered_df.empty:
+        if not valid.any():
             logger.warning("Нет валидных данных для violin plot")
-            return {"data": [], "layout": {"title": "Violin-plot по предметам"}}
-
-        subjects = filtered_df["subject"].unique()
-
-        if len(subjects) == 0:
-            logger.warning("Нет предметов для violin plot")
-            return {"data": [], "layout": {"title": "Violin-plot по предметам"}}
-
-        fig = go.Figure()
-
-        # Используем violin plot вместо box plot для лучшей визуализации распределения
-        for subject in subjects:
-            subject_data = filtered_df[filtered_df["subject"] == subject][
-                "grade"
-            ].dropna()
-
-            grades_list = []
-            for g in subject_data.tolist():
-                try:
-                    grade_val = float(g)
-                    if not pd.isna(grade_val) and 0 <= grade_val <= 5:
-                        grades_list.append(grade_val)
-                except (ValueError, TypeError):
-                    continue
-
-            if len(grades_list) > 0:
-                fig.add_trace(
-                    go.Violin(
-                        y=grades_list,
-                        name=str(subject),
-                        box_visible=True,
-                        meanline_visible=True,
-                        fillcolor=COLORS["primary"],
-                        line_color=COLORS["dark"],
-                        opacity=0.7,
-                        hovertemplate="Предмет: %{fullData.name}<br>Оценка: %{y:.2f}<extra></extra>",
-                    )
-                )
-
-        if len(fig.data) == 0:
-            logger.warning("Нет данных для отображения в violin plot")
-            return {"data": [], "layout": {"title": "Violin-plot по предметам"}}
-
-        fig.update_layout(
-            title={
-                "text": "Распределение оценок по предметам (Violin Plot)",
-                "x": 0.5,
-                "xanchor": "center",
-                "font": {"size": 18, "color": COLORS["dark"]},
-            },
-            xaxis_title="Предмет",
-            yaxis_title="Оценка",
-            template="plotly_white",
-            hovermode="x unified",
-            showlegend=False,
-            yaxis=dict(range=[0, 5.5], dtick=0.5),
-            autosize=True,  # Адаптивный размер
-            margin=dict(l=70, r=80, t=70, b=100),  # Отступы для повернутых меток
-            font=dict(family="Arial, sans-serif", size=11, color=COLORS["dark"]),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
-        )
+            return _empty_plot("Violin-plot по предметам")
+
+        # Коды предметов в порядке первого появления (как groupby с sort=False),
+        # затем стабильная сортировка по коду раскладывает оценки по предметам
+        subject_codes, subjects = pd.factorize(df["subject"].iloc[valid])
+        order = np.argsort(subject_codes, kind="stable")
+        counts = np.bincount(subject_codes, minlength=len(subjects))
+        grades_by_subject = np.split(grades[valid][order], np.cumsum(counts)[:-1])
+
+        # Используем violin plot вместо box plot для лучшей визуализации распределения;
+        # оценки остаются массивами NumPy (orjson сериализует их без tolist)
+        traces = [
+            {
+                "type": "violin",
+                "y": subject_grades,
+                "name": str(subject),
+                "box": {"visible": True},
+                "meanline": {"visible": True},
+                "fillcolor": COLORS.primary,
+                "line": {"color": COLORS.dark},
+                "opacity": 0.7,
+                "hovertemplate": "Предмет: %{fullData.name}<br>Оценка: %{y:.2f}<extra></extra>",
+            }
+            for subject, subject_grades in zip(subjects, grades_by_subject)
+        ]
 
-        return fig.to_dict()
+        return {"data": traces, "layout": VIOLIN_LAYOUT}
     except Exception as e:
         logger.error(f"Ошибка создания violin plot по предметам: {e}")
-        return {"data": [], "layout": {"title": "Violin-plot по предметам - Ошибка"}}
+        return _empty_plot("Violin-plot по предметам - Ошибка")
 
 
+@cached_figure(columns=["subject", "grade", "date"])
+@with_plot_dtypes
 def create_scatter_trend_plot(df: pd.DataFrame, subject: Optional[str] = None) -> Dict:
     """
     Создаёт scatter plot с регрессионной линией для анализа корреляции.
@@ -1251,116 +1768,116 @@ def create_scatter_trend_plot(df: pd.DataFrame, subject: Optional[str] = None) -
     """
     try:
         if df.empty or "date" not in df.columns or "grade" not in df.columns:
-            return {"data": [], "layout": {}}
-
-        filtered_df = df.copy()
-
-        if subject is not None:
-            filtered_df = filtered_df[
-                filtered_df["subject"].str.lower() == subject.lower()
-            ]
-
-        if filtered_df.empty:
-            return {"data": [], "layout": {}}
+            return _empty_plot()
 
-        filtered_df["date"] = pd.to_datetime(filtered_df["date"], errors="coerce")
-        filtered_df = filtered_df.dropna(subset=["date", "grade"])
+        filtered_df = _filter_df(df, subject=subject, columns=["date", "grade"])
 
         if filtered_df.empty:
-            return {"data": [], "layout": {}}
-
-        filtered_df = filtered_df.sort_values("date")
-        filtered_df["days_since_start"] = (
-            filtered_df["date"] - filtered_df["date"].min()
-        ).dt.days
+            return _empty_plot()
+
+        # Даты уже разобраны декоратором with_plot_dtypes. Пропуски и оценки
+        # вне шкалы отсекаются одной маской по массивам; сортировка по дате
+        # не нужна - ни маркерам, ни регрессии порядок точек не важен.
+        # Принимаем любые валидные числовые оценки (не только 0-5)
+        dates = filtered_df["date"].to_numpy(dtype="datetime64[ns]")
+        grades = pd.to_numeric(filtered_df["grade"], errors="coerce").to_numpy(
+            dtype=np.float64
+        )
+        present = ~np.isnat(dates) & ~np.isnan(grades)
+        valid = present & (grades >= 0)
 
-        grades_list = []
-        days_list = []
-        for _, row in filtered_df.iterrows():
-            try:
-                grade_val = float(row["grade"])
-                # Принимаем любые валидные числовые оценки (не только 0-5)
-                if not pd.isna(grade_val) and grade_val >= 0:
-                    grades_list.append(grade_val)
-                    days_list.append(row["days_since_start"])
-            except (ValueError, TypeError):
-                continue
+        if np.count_nonzero(valid) < 2:
+            return _empty_plot()
 
-        if len(grades_list) < 2:
-            return {"data": [], "layout": {}}
+        # Начало отсчёта дней - самая ранняя дата среди строк с датой и оценкой
+        # (как и до фильтрации по шкале), а не только среди валидных оценок
+        origin = dates[present].min()
+        dates, grades = dates[valid], grades[valid]
+        days = (dates - origin) // np.timedelta64(1, "D")
 
         # Определяем диапазон оценок для настройки colorbar
-        min_grade = min(grades_list) if grades_list else 0
-        max_grade = max(grades_list) if grades_list else 100
+        min_grade = grades.min()
+        max_grade = grades.max()
         grade_range = max_grade - min_grade
 
         # Определяем, используется ли шкала 0-5 или 0-100
         is_percentage_scale = max_grade > 10
 
-        fig = go.Figure()
-
-        # Scatter plot
-        fig.add_trace(
-            go.Scatter(
-                x=days_list,
-                y=grades_list,
-                mode="markers",
-                name="Оценки",
-                marker=dict(
-                    size=8,
-                    color=grades_list,
-                    colorscale=HEATMAP_COLORS,
-                    cmin=min_grade,
-                    cmax=max_grade,
-                    showscale=True,
-                    colorbar=dict(title="Оценка"),
-                    line=dict(width=1, color="white"),
+        # Scatter plot; при большом числе точек рисуем через WebGL. Массивы
+        # NumPy передаются без tolist() - API сериализует их orjson напрямую
+        traces = [
+            {
+                "type": (
+                    "scattergl"
+                    if grades.size >= SCATTER_WEBGL_MIN_POINTS
+                    else "scatter"
                 ),
-                hovertemplate="День: %{x}<br>Оценка: %{y:.2f}<extra></extra>",
-            )
-        )
+                "x": days,
+                "y": grades,
+                "mode": "markers",
+                "name": "Оценки",
+                "marker": {
+                    "size": 8,
+                    "color": grades,
+                    "colorscale": [list(stop) for stop in HEATMAP_COLORS],
+                    "cmin": min_grade,
+                    "cmax": max_grade,
+                    "showscale": True,
+                    "colorbar": {"title": {"text": "Оценка"}},
+                    "line": {"width": 1, "color": "white"},
+                },
+                "hovertemplate": "День: %{x}<br>Оценка: %{y:.2f}<extra></extra>",
+            }
+        ]
 
         # Регрессионная линия (только если есть вариация в днях)
-        min_days = min(days_list) if days_list else 0
-        max_days = max(days_list) if days_list else 0
+        min_days = int(days.min())
+        max_days = int(days.max())
         days_range = max_days - min_days
 
-        if len(grades_list) >= 2:
+        if grades.size >= 2:
             try:
                 # Проверяем, что есть вариация в днях для построения регрессии
-                if days_range > 0 and len(set(days_list)) > 1:
-                    slope, intercept, r_value, p_value, std_err = stats.linregress(
-                        days_list, grades_list
+                if days_range > 0:
+                    slope, intercept, r_squared = _linear_fit(
+                        days.astype(np.float64), grades
                     )
-                    x_trend = np.linspace(min_days, max_days, 100)
+                    # Прямая полностью задаётся двумя концами
+                    x_trend = np.array([min_days, max_days], dtype=np.float64)
                     y_trend = slope * x_trend + intercept
 
-                    fig.add_trace(
-                        go.Scatter(
-                            x=x_trend,
-                            y=y_trend,
-                            mode="lines",
-                            name=f"Тренд (R²={r_value**2:.3f})",
-                            line=dict(color=COLORS["danger"], width=3),
-                            hovertemplate="День: %{x:.0f}<br>Тренд: %{y:.2f}<extra></extra>",
-                        )
+                    traces.append(
+                        {
+                            "type": "scatter",
+                            "x": x_trend,
+                            "y": y_trend,
+                            "mode": "lines",
+                            "name": f"Тренд (R²={r_squared:.3f})",
+                            "line": {"color": COLORS.danger, "width": 3},
+                            "hovertemplate": "День: %{x:.0f}<br>Тренд: %{y:.2f}<extra></extra>",
+                        }
                     )
                 elif days_range == 0:
                     # Если все даты одинаковые, показываем горизонтальную линию среднего
-                    avg_grade = np.mean(grades_list)
-                    fig.add_trace(
-                        go.Scatter(
-                            x=(
+                    avg_grade = grades.mean()
+                    traces.append(
+                        {
+                            "type": "scatter",
+                            "x": (
                                 [min_days - 1, max_days + 1]
                                 if max_days >= min_days
                                 else [0, 1]
                             ),
-                            y=[avg_grade, avg_grade],
-                            mode="lines",
-                            name=f"Среднее: {avg_grade:.2f}",
-                            line=dict(color=COLORS["danger"], width=3, dash="dash"),
-                            hovertemplate="Средняя оценка: %{y:.2f}<extra></extra>",
-                        )
+                            "y": [avg_grade, avg_grade],
+                            "mode": "lines",
+                            "name": f"Среднее: {avg_grade:.2f}",
+                            "line": {
+                                "color": COLORS.danger,
+                                "width": 3,
+                                "dash": "dash",
+                            },
+                            "hovertemplate": "Средняя оценка: %{y:.2f}<extra></extra>",
+                        }
                     )
             except Exception as e:
                 logger.warning(f"Не удалось построить регрессионную линию: {e}")
@@ -1410,7 +1927,7 @@ def create_scatter_trend_plot(df: pd.DataFrame, subject: Optional[str] = None) -
         # Настройка осей с автоматическим масштабированием
         xaxis_config = dict(
             title=dict(
-                text="Дни с начала периода", font=dict(size=12, color=COLORS["dark"])
+                text="Дни с начала периода", font=dict(size=12, color=COLORS.dark)
             ),
             autorange=True,  # Автоматическое масштабирование
             range=(
@@ -1424,7 +1941,7 @@ def create_scatter_trend_plot(df: pd.DataFrame, subject: Optional[str] = None) -
             linewidth=1,
             tickmode="auto",
             nticks=x_nticks,
-            tickfont=dict(size=10, color=COLORS["dark"]),
+            tickfont=dict(size=10, color=COLORS.dark),
         )
 
         # Определяем диапазон для оси Y
@@ -1436,7 +1953,7 @@ def create_scatter_trend_plot(df: pd.DataFrame, subject: Optional[str] = None) -
             y_range = [0, 5.5]
 
         yaxis_config = dict(
-            title=dict(text="Оценка", font=dict(size=12, color=COLORS["dark"])),
+            title=dict(text="Оценка", font=dict(size=12, color=COLORS.dark)),
             autorange=True,  # Автоматическое масштабирование
             range=y_range,
             showgrid=True,
@@ -1448,40 +1965,47 @@ def create_scatter_trend_plot(df: pd.DataFrame, subject: Optional[str] = None) -
             zeroline=False,
             tickmode="auto",
             nticks=y_nticks,
-            tickfont=dict(size=10, color=COLORS["dark"]),
+            tickfont=dict(size=10, color=COLORS.dark),
             rangemode="normal",  # Нормальный режим масштабирования
         )
 
-        fig.update_layout(
+        layout = _layout(
             title={
                 "text": title,
                 "x": 0.5,
                 "xanchor": "center",
-                "font": {"size": 18, "color": COLORS["dark"]},
+                "font": {"size": 18, "color": COLORS.dark},
             },
-            template="plotly_white",
             hovermode="closest",
             xaxis=xaxis_config,
             yaxis=yaxis_config,
-            autosize=True,  # Адаптивный размер
-            margin=dict(l=70, r=100, t=70, b=70),  # Увеличен правый отступ для colorbar
-            font=dict(family="Arial, sans-serif", size=11, color=COLORS["dark"]),
-            plot_bgcolor="white",
-            paper_bgcolor="white",
+            margin={
+                "l": 70,
+                "r": 100,
+                "t": 70,
+                "b": 70,
+            },  # Увеличен правый отступ для colorbar
         )
 
-        return fig.to_dict()
+        return {"data": traces, "layout": layout}
     except Exception as e:
         logger.error(f"Ошибка создания scatter plot: {e}")
-        return {"data": [], "layout": {}}
+        return _empty_plot()
 
 
+@cached_figure(
+    columns=["student_id", "student_name", "subject", "grade", "date"],
+    uses_grading_system=True,
+)
 def create_dashboard_plots(
     df: pd.DataFrame, student_id: Optional[int] = None, subject: Optional[str] = None
 ) -> Dict:
     """
     Создаёт набор полностью переработанных графиков для дашборда.
 
+    Весь набор кешируется целиком: при повторной отрисовке с теми же данными
+    и фильтрами не выполняются ни приведение типов, ни запуск задач в пуле.
+
     Args:
         df: DataFrame с данными об оценках
         student_id: ID студента (если None, по всем студентам)
@@ -1490,17 +2014,34 @@ def create_dashboard_plots(
     Returns:
         Словарь с несколькими графиками
     """
-    plots = {
-        "grade_distribution": create_grade_distribution_plot(
-            df, student_id=student_id, subject=subject
+    # Типы колонок, даты и месячные периоды нужны нескольким графикам -
+    # приводим и вычисляем их один раз
+    if not df.empty:
+        df = _add_month_keys(_ensure_plot_dtypes(df))
+
+    # Графики независимы, а основная работа идёт в C-коде pandas/NumPy,
+    # отпускающем GIL, поэтому строим их параллельно в пуле потоков
+    tasks = {
+        "grade_distribution": (
+            create_grade_distribution_plot,
+            {"student_id": student_id, "subject": subject},
+        ),
+        "performance_trend": (
+            create_performance_trend_plot,
+            {"student_id": student_id, "subject": subject},
         ),
-        "performance_trend": create_performance_trend_plot(
-            df, student_id=student_id, subject=subject
+        "subject_comparison": (
+            create_subject_comparison_plot,
+            {"student_id": student_id},
         ),
-        "subject_comparison": create_subject_comparison_plot(df, student_id=student_id),
-        "student_comparison": create_student_comparison_plot(df, subject=subject),
-        "subject_heatmap": create_subject_heatmap(df, student_id=student_id),
-        "scatter_trend": create_scatter_trend_plot(df, subject=subject),
+        "student_comparison": (create_student_comparison_plot, {"subject": subject}),
+        "subject_heatmap": (create_subject_heatmap, {"student_id": student_id}),
+        "scatter_trend": (create_scatter_trend_plot, {"subject": subject}),
+    }
+    futures = {
+        name: _PLOT_EXECUTOR.submit(func, df, **kwargs)
+        for name, (func, kwargs) in tasks.items()
     }
+    plots = {name: future.result() for name, future in futures.items()}
 
     return plots
@@ -2,9 +2,15 @@
 Тесты для API endpoints.
 """
 
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
-from src.app import app
+import src.app as app_module
+from src.app import app, serialize_plot_data
+from src.data_loader import DataLoader
 
 client = TestClient(app)
 
@@ -191,3 +197,70 @@ def test_cors_headers():
     response = client.options("/api/students")
     # CORS middleware должен обработать OPTIONS запрос
     assert response.status_code in [200, 405]  # 405 если метод не разрешен
+
+
+def test_serialize_plot_data_handles_numpy_and_nan():
+    """Тест сериализации данных графиков с типами NumPy и NaN."""
+    plot_dict = {
+        "data": [{"y": np.array([1.5, np.nan]), "x": [np.int64(1), float("nan")]}],
+        "layout": {"title": "Тест"},
+    }
+
+    result = json.loads(serialize_plot_data(plot_dict))
+
+    assert result["data"][0]["y"] == [1.5, None]
+    assert result["data"][0]["x"] == [1, None]
+    assert result["layout"]["title"] == "Тест"
+
+
+def test_serialize_plot_data_reuses_json_of_same_plot():
+    """Тест повторного использования JSON графика при сборке дашборда."""
+    plot = {"data": [{"y": np.array([1.0, 2.0])}], "layout": {}}
+    dashboard = {"first": plot, "second": {"data": [], "layout": {}}}
+
+    first_json = serialize_plot_data(plot)
+
+    assert serialize_plot_data(plot) is first_json
+    assert json.loads(serialize_plot_data(dashboard)) == {
+        "first": {"data": [{"y": [1.0, 2.0]}], "layout": {}},
+        "second": {"data": [], "layout": {}},
+    }
+
+
+def test_serialize_plot_data_is_thread_safe(monkeypatch):
+    """Тест сериализации графиков из нескольких потоков при вытеснении из кеша."""
+    monkeypatch.setattr(app_module, "PLOT_JSON_CACHE_SIZE", 2)
+    plots_list = [
+        {"data": [{"y": np.array([float(i)])}], "layout": {}} for i in range(20)
+    ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(serialize_plot_data, plots_list * 25))
+
+    assert [json.loads(r)["data"][0]["y"] for r in results[:20]] == [
+        [float(i)] for i in range(20)
+    ]
+
+
+def test_plot_data_not_modified_for_matching_etag(tmp_path, monkeypatch):
+    """Тест ответа 304 при повторном запросе с тем же ETag."""
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    (data_dir / "grades.csv").write_text(
+        "student_id,student_name,subject,grade,date\n"
+        "1,Анна,Математика,5,2024-01-10\n"
+        "2,Иван,Физика,4,2024-02-11\n",
+        encoding="utf-8",
+    )
+    loader = DataLoader(data_dir=str(data_dir), cache_dir=str(tmp_path / "processed"))
+    monkeypatch.setattr(app_module, "data_loader", loader)
+
+    response = client.get("/api/plot-data?plot_type=comparison")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    cached = client.get(
+        "/api/plot-data?plot_type=comparison", headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.content == b""
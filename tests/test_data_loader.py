@@ -0,0 +1,164 @@
+"""
+Тесты для DataLoader.
+"""
+
+import asyncio
+
+import pandas as pd
+import pytest
+
+from src.data_loader import DataLoader
+
+
+@pytest.fixture
+def loader(tmp_path):
+    """DataLoader с временными директориями данных и кеша."""
+    data_dir = tmp_path / "raw"
+    data_dir.mkdir()
+    return DataLoader(data_dir=str(data_dir), cache_dir=str(tmp_path / "processed"))
+
+
+def _write_grades(path, rows):
+    """Записывает CSV с оценками."""
+    pd.DataFrame(
+        rows, columns=["student_id", "student_name", "subject", "grade", "date"]
+    ).to_csv(path, index=False)
+
+
+def test_load_many_concatenates_files(loader):
+    """Тест параллельного чтения нескольких файлов."""
+    _write_grades(
+        loader.data_dir / "a.csv", [[1, "Анна", "Математика", 5, "2024-01-10"]]
+    )
+    _write_grades(
+        loader.data_dir / "b.csv",
+        [
+            [2, "Иван", "Физика", 4, "2024-01-11"],
+            [3, "Олег", "Химия", 3, "2024-01-12"],
+        ],
+    )
+
+    df = asyncio.run(loader.load_many())
+
+    assert len(df) == 3
+    assert sorted(df["student_id"].tolist()) == [1, 2, 3]
+
+
+def test_load_many_without_files(loader):
+    """Тест ошибки при отсутствии файлов."""
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(loader.load_many())
+
+
+def test_find_new_grades_returns_only_new_rows(loader):
+    """Тест поиска новых оценок относительно кеша."""
+    rows = [
+        [1, "Анна", "Математика", 5, "2024-01-10"],
+        [2, "Иван", "Физика", 4, "2024-01-11"],
+    ]
+    _write_grades(loader.data_dir / "grades.csv", rows)
+    previous = loader.load_data(use_cache=True)
+
+    new_row = pd.DataFrame(
+        [[3, "Олег", "Химия", 3, pd.Timestamp("2024-01-12")]],
+        columns=previous.columns,
+    )
+    current = pd.concat([previous, new_row], ignore_index=True)
+
+    new_grades = loader.find_new_grades(current)
+
+    assert new_grades["student_id"].tolist() == [3]
+
+
+def test_find_new_grades_with_missing_previous_id(loader):
+    """Тест поиска новых оценок, если в предыдущих данных есть пропущенный ID."""
+    rows = [
+        [1, "Анна", "Математика", 5, "2024-01-10"],
+        [2, "Иван", "Физика", 4, "2024-01-11"],
+    ]
+    _write_grades(loader.data_dir / "grades.csv", rows)
+    previous = loader.load_data(use_cache=True)
+
+    # В кеше оказалась строка без ID - колонка читается из CSV как float
+    cached_path = loader._load_cache()["data_path"]
+    missing_id = pd.DataFrame(
+        [[None, "Олег", "Химия", 3, pd.Timestamp("2024-01-12")]],
+        columns=previous.columns,
+    )
+    pd.concat([previous, missing_id], ignore_index=True).to_csv(
+        cached_path, index=False
+    )
+
+    new_row = pd.DataFrame(
+        [[3, "Олег", "Химия", 3, pd.Timestamp("2024-01-12")]],
+        columns=previous.columns,
+    )
+    current = pd.concat([previous, new_row], ignore_index=True)
+
+    new_grades = loader.find_new_grades(current)
+
+    assert new_grades["student_id"].tolist() == [3]
+
+
+def test_get_students_list_unique_by_id(loader):
+    """Тест получения списка уникальных студентов."""
+    df = pd.DataFrame(
+        {
+            "student_id": [2, 1, 2, 1],
+            "student_name": ["Иван", "Анна", "Иван", "Анна"],
+            "grade": [4, 5, 3, 4],
+        }
+    )
+
+    students = loader.get_students_list(df)
+
+    assert students == [
+        {"student_id": 1, "student_name": "Анна"},
+        {"student_id": 2, "student_name": "Иван"},
+    ]
+
+
+def test_load_data_from_cache_parses_dates(loader):
+    """Тест: данные из кеша возвращаются с уже разобранными датами."""
+    _write_grades(
+        loader.data_dir / "grades.csv", [[1, "Анна", "Математика", 5, "2024-01-10"]]
+    )
+    loader.load_data(use_cache=True)
+
+    cached = loader.load_data(use_cache=True)
+
+    assert pd.api.types.is_datetime64_any_dtype(cached["date"])
+
+
+def test_get_grades_filters_by_subject_and_dates(loader):
+    """Тест фильтрации оценок по предмету без учёта регистра и по датам."""
+    df = pd.DataFrame(
+        {
+            "student_id": [1, 1, 2, 2],
+            "subject": ["Математика", "Физика", "математика", "Математика"],
+            "grade": [5, 4, 3, 4],
+            "date": ["2024-01-10", "2024-01-11", "2024-02-12", "2024-03-13"],
+        }
+    )
+
+    grades = loader.get_grades(
+        df, subject="МАТЕМАТИКА", start_date="2024-01-01", end_date="2024-02-28"
+    )
+
+    assert grades["grade"].tolist() == [5, 3]
+    assert loader.get_grades(df) is df
+
+
+def test_get_grades_matches_subject_like_plots(loader):
+    """Тест фильтрации по предмету с пробелами и casefold (как в графиках)."""
+    df = pd.DataFrame(
+        {
+            "student_id": [1, 2, 3],
+            "subject": ["Straße", "STRASSE", "Физика"],
+            "grade": [5, 4, 3],
+        }
+    )
+
+    grades = loader.get_grades(df, subject=" strasse ")
+
+    assert grades["grade"].tolist() == [5, 4]
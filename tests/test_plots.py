@@ -0,0 +1,262 @@
+"""
+Тесты для модуля построения графиков.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from src import plots
+
+
+@pytest.fixture
+def grades_df():
+    """Небольшой набор оценок для построения графиков."""
+    return pd.DataFrame(
+        {
+            "student_id": [1, 1, 2, 2, 3],
+            "student_name": ["Анна", "Анна", "Иван", "Иван", "Олег"],
+            "subject": ["Математика", "Физика", "Математика", "Физика", "Химия"],
+            "grade": [5.0, 4.0, 3.0, 4.0, 5.0],
+            "date": pd.to_datetime(
+                [
+                    "2024-01-10",
+                    "2024-02-11",
+                    "2024-01-12",
+                    "2024-03-13",
+                    "2024-02-14",
+                ]
+            ),
+        }
+    )
+
+
+def test_filter_df_by_student_and_subject(grades_df):
+    """Тест фильтрации по студенту и предмету без учета регистра."""
+    filtered = plots._filter_df(grades_df, student_id=1, subject=" математика ")
+
+    assert filtered["student_id"].tolist() == [1]
+    assert filtered["subject"].tolist() == ["Математика"]
+
+
+def test_filter_df_by_categorical_subject(grades_df):
+    """Тест фильтрации по категориальной колонке предметов."""
+    categorical_df = grades_df.assign(subject=grades_df["subject"].astype("category"))
+
+    filtered = plots._filter_df(categorical_df, subject="ФИЗИКА")
+
+    assert filtered["student_id"].tolist() == [1, 2]
+
+
+def test_filter_df_without_filters_returns_same_frame(grades_df):
+    """Тест отсутствия копирования, если фильтры не заданы."""
+    assert plots._filter_df(grades_df) is grades_df
+
+
+def test_cached_figure_reuses_result_for_equal_data(grades_df):
+    """Тест повторного использования графика для одинаковых данных."""
+    first = plots.create_subject_comparison_plot(grades_df)
+    second = plots.create_subject_comparison_plot(grades_df.copy())
+    changed = grades_df.assign(grade=grades_df["grade"] - 1)
+
+    assert second is first
+    assert plots.create_subject_comparison_plot(changed) is not first
+
+
+def test_cached_figure_ignores_unused_columns(grades_df):
+    """Тест: изменение колонок, не используемых графиком, не сбрасывает кеш."""
+    first = plots.create_box_plot_by_subject(grades_df)
+    shifted = grades_df.assign(date=grades_df["date"] + pd.Timedelta(days=1))
+
+    assert plots.create_box_plot_by_subject(shifted) is first
+    assert plots.create_scatter_trend_plot(
+        shifted
+    ) is not plots.create_scatter_trend_plot(grades_df)
+
+
+def test_ensure_plot_dtypes_returns_converted_frame_unchanged(grades_df):
+    """Тест: повторная нормализация типов не создаёт новый DataFrame."""
+    converted = plots._ensure_plot_dtypes(grades_df)
+
+    assert plots._ensure_plot_dtypes(converted) is converted
+    assert plots._df_fingerprint(converted) == plots._df_fingerprint(
+        grades_df.assign(**{col: converted[col] for col in converted.columns})
+    )
+
+
+def test_cached_figure_hit_skips_dtype_conversion(grades_df, monkeypatch):
+    """Тест: при попадании в кеш типы колонок заново не приводятся."""
+    first = plots.create_subject_comparison_plot(grades_df)
+
+    def fail(df):
+        raise AssertionError("_ensure_plot_dtypes вызван при попадании в кеш")
+
+    monkeypatch.setattr(plots, "_ensure_plot_dtypes", fail)
+
+    assert plots.create_subject_comparison_plot(grades_df.copy()) is first
+
+
+def test_ensure_plot_dtypes_keeps_minimal_integer_ids():
+    """Тест: ID минимального целого типа не конвертируются повторно."""
+    df = pd.DataFrame(
+        {"student_id": np.array([1, 300], dtype=np.int16), "grade": [4.0, 5.0]}
+    )
+
+    assert plots._ensure_plot_dtypes(df) is df
+    assert (
+        plots._ensure_plot_dtypes(df.astype({"student_id": np.int64})).student_id.dtype
+        == np.int16
+    )
+
+
+def test_fast_kde_matches_gaussian_kde():
+    """Тест совпадения быстрой KDE с scipy.stats.gaussian_kde."""
+    samples = np.random.default_rng(0).integers(2, 6, size=300).astype(float)
+    x_eval = np.linspace(samples.min(), samples.max(), 150)
+
+    expected = stats.gaussian_kde(samples)(x_eval)
+    actual = plots._fast_kde_1d(samples, x_eval)
+
+    np.testing.assert_allclose(actual, expected, atol=1e-3 * expected.max())
+
+
+def test_grouped_stats_matches_pandas_groupby():
+    """Тест совпадения групповых статистик с pandas groupby."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "student_id": rng.integers(1, 20, size=500),
+            "student_name": rng.choice(["Анна", "Иван", "Олег"], size=500),
+            "grade": rng.choice([2.0, 3.0, 4.0, 5.0, np.nan], size=500),
+        }
+    )
+    keys = ["student_id", "student_name"]
+
+    expected = (
+        df.groupby(keys)["grade"].agg(["mean", "std", "count", "median"]).reset_index()
+    )
+    actual = plots._grouped_stats(df, keys, median=True)
+
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_box_plot_keeps_subject_order_and_grade_range():
+    """Тест violin plot: порядок предметов и фильтрация оценок вне шкалы."""
+    df = pd.DataFrame(
+        {
+            "subject": ["Физика", "Математика", "Физика", "Химия", "Математика"],
+            "grade": [4.0, 5.0, 3.0, 7.0, np.nan],
+        }
+    )
+
+    result = plots.create_box_plot_by_subject(df)
+
+    assert [trace["name"] for trace in result["data"]] == ["Физика", "Математика"]
+    assert [trace["y"].tolist() for trace in result["data"]] == [[4.0, 3.0], [5.0]]
+
+
+def test_heatmap_uses_only_observed_subjects_and_months(grades_df):
+    """Тест тепловой карты: оси содержат только встречающиеся предметы и месяцы."""
+    categorical_df = grades_df.assign(subject=grades_df["subject"].astype("category"))
+
+    result = plots.create_subject_heatmap(categorical_df, student_id=1)
+    trace = result["data"][0]
+
+    assert trace["y"] == ["Математика", "Физика"]
+    assert trace["x"] == ["2024-01", "2024-02"]
+    np.testing.assert_array_equal(trace["z"], [[5.0, np.nan], [np.nan, 4.0]])
+
+
+def test_distribution_skips_kde_for_few_distinct_grades(grades_df):
+    """Тест: KDE не строится, если различных оценок меньше порога."""
+    result = plots.create_grade_distribution_plot(grades_df)
+
+    assert [trace["type"] for trace in result["data"]] == ["bar"]
+
+
+def test_dashboard_plots_cached_for_equal_data(grades_df):
+    """Тест повторного использования набора графиков дашборда."""
+    first = plots.create_dashboard_plots(grades_df, subject="Математика")
+
+    assert plots.create_dashboard_plots(grades_df.copy(), subject="Математика") is first
+    assert plots.create_dashboard_plots(grades_df) is not first
+
+
+def test_max_grade_reloaded_after_grading_system_change(tmp_path, monkeypatch):
+    """Тест: система оценивания перечитывается только после изменения файла."""
+    monkeypatch.setattr(plots, "PROCESSED_DIR", tmp_path)
+    grading_file = tmp_path / "grading_system.json"
+
+    assert plots.get_max_grade_from_grading_system() is None
+
+    grading_file.write_text('{"system_type": "100-point"}', encoding="utf-8")
+    assert plots.get_max_grade_from_grading_system() == 100.0
+
+    grading_file.write_text(
+        '{"system_type": "custom", "max_grade": 10}', encoding="utf-8"
+    )
+    assert plots.get_max_grade_from_grading_system() == 10.0
+
+
+def test_dashboard_cache_follows_grading_system(grades_df, tmp_path, monkeypatch):
+    """Тест: смена системы оценивания не отдаёт дашборд со старой шкалой."""
+    monkeypatch.setattr(plots, "PROCESSED_DIR", tmp_path)
+    grading_file = tmp_path / "grading_system.json"
+
+    grading_file.write_text('{"system_type": "5-point"}', encoding="utf-8")
+    first = plots.create_dashboard_plots(grades_df)
+    assert first["subject_heatmap"]["data"][0]["zmax"] == 5.0
+
+    grading_file.write_text('{"system_type": "100-point"}', encoding="utf-8")
+    second = plots.create_dashboard_plots(grades_df)
+    assert second["subject_heatmap"]["data"][0]["zmax"] == 100.0
+
+
+def test_heatmap_uses_new_grading_system_after_change(grades_df, tmp_path, monkeypatch):
+    """Тест: тепловая карта берёт zmax из обновлённой системы оценивания."""
+    monkeypatch.setattr(plots, "PROCESSED_DIR", tmp_path)
+    grading_file = tmp_path / "grading_system.json"
+
+    grading_file.write_text('{"system_type": "5-point"}', encoding="utf-8")
+    assert plots.create_subject_heatmap(grades_df)["data"][0]["zmax"] == 5.0
+
+    grading_file.write_text(
+        '{"system_type": "custom", "max_grade": 10}', encoding="utf-8"
+    )
+    assert plots.create_subject_heatmap(grades_df)["data"][0]["zmax"] == 10.0
+
+
+def test_distribution_keeps_narrow_bins_apart():
+    """Тест: интервалы уже 0.01 получают различные подписи и не сливаются."""
+    grades = np.linspace(4.0, 4.3, 120)
+    df = pd.DataFrame({"grade": grades})
+
+    bar = plots.create_grade_distribution_plot(df)["data"][0]
+
+    assert len(bar["x"]) == plots.DISTRIBUTION_MAX_BARS
+    assert len(set(bar["x"])) == len(bar["x"])
+    assert sum(bar["customdata"]) == grades.size
+
+
+def test_subject_comparison_keeps_integer_counts(grades_df):
+    """Тест: количество оценок в customdata остаётся целым числом."""
+    bar = plots.create_subject_comparison_plot(grades_df)["data"][0]
+
+    assert [type(count) for _, count in bar["customdata"]] == [int, int, int]
+
+
+def test_scatter_days_counted_from_earliest_dated_grade():
+    """Тест: отсчёт дней начинается с самой ранней строки, даже с невалидной оценкой."""
+    df = pd.DataFrame(
+        {
+            "subject": ["Математика"] * 3,
+            "grade": [-1.0, 4.0, 5.0],
+            "date": pd.to_datetime(["2024-01-01", "2024-01-03", "2024-01-05"]),
+        }
+    )
+
+    markers = plots.create_scatter_trend_plot(df)["data"][0]
+
+    assert markers["x"].tolist() == [2, 4]
+    assert markers["y"].tolist() == [4.0, 5.0]